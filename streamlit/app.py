@@ -7,12 +7,29 @@ import streamlit as st
 import time
 from utils import (
     initialize_session_state,
-    load_and_validate_csv,
-    parse_text_input,
-    pregenerate_audio,
+    deck_digest,
+    load_deck_file,
+    load_from_library,
+    list_library_decks,
+    search_deck,
+    start_practice_set,
+    end_practice_set,
+    DECK_FILE_TYPES,
+    load_text_deck,
+    set_audio_pattern,
+    AUDIO_PATTERNS,
+    sync_generated_audio,
+    start_audio_generation,
+    get_generation_status,
+    is_tts_paused,
+    get_row_peaks,
+    render_waveform,
     play_audio_with_stats_v2,
     play_audio_with_mediaelement,
+    play_deck_loop,
+    get_row_at_time,
 )
+from deck_render import cues_to_vtt
 
 
 def main():
@@ -258,6 +275,39 @@ def main():
     .viz-bar:nth-child(8) { animation-delay: 0.7s; height: 35%; }
     .viz-bar:nth-child(9) { animation-delay: 0.8s; height: 20%; }
 
+    /* 실제 파형 비주얼라이저 */
+    .waveform {
+        position: relative;
+        height: 60px;
+        margin: 0 32px 12px;
+    }
+
+    .waveform-bars {
+        position: absolute;
+        inset: 0;
+        display: flex;
+        align-items: center;
+        gap: 1px;
+        opacity: 0.3;
+    }
+
+    .waveform-bars span {
+        flex: 1;
+        background: linear-gradient(to top, var(--primary), var(--secondary));
+        border-radius: 1px;
+    }
+
+    .waveform-played {
+        opacity: 1;
+        clip-path: inset(0 100% 0 0);
+        animation: waveform-progress linear forwards;
+    }
+
+    @keyframes waveform-progress {
+        from { clip-path: inset(0 100% 0 0); }
+        to { clip-path: inset(0 0 0 0); }
+    }
+
     @keyframes wave {
         0%, 100% { transform: scaleY(1); }
         50% { transform: scaleY(1.5); }
@@ -677,27 +727,47 @@ def main():
 
         input_method = st.radio(
             "Input Method",
-            ["CSV Upload", "Text Paste"],
+            ["File Upload", "Text Paste", "Library"],
             label_visibility="collapsed"
         )
 
-        if input_method == "CSV Upload":
+        if input_method == "File Upload":
             uploaded_file = st.file_uploader(
-                "Upload CSV",
-                type=['csv'],
-                help="CSV with English and Korean columns"
+                "Upload CSV / XLSX / ODS / SRT / VTT",
+                type=DECK_FILE_TYPES,
+                help="CSV, Excel or OpenDocument sheet with English and Korean columns, or SRT/WebVTT subtitles"
             )
 
-            if uploaded_file is not None:
-                # 파일 이름이 변경되었을 때만 새로 로드
-                file_id = f"{uploaded_file.name}_{uploaded_file.size}"
+            # 이미 불러온 업로드는 다시 실행될 때마다 내용을 해시하지 않음
+            if uploaded_file is not None and st.session_state.get('loaded_upload_id') != uploaded_file.file_id:
+                # 새 업로드라도 파일 내용이 바뀌었을 때만 새로 로드
+                file_id = deck_digest(uploaded_file)
                 if 'loaded_file_id' not in st.session_state or st.session_state.loaded_file_id != file_id:
-                    df = load_and_validate_csv(uploaded_file)
-                    if df is not None:
-                        st.session_state.df = df
+                    deck = load_deck_file(uploaded_file, file_id)
+                    if deck is not None:
                         st.session_state.loaded_file_id = file_id
-                        pregenerate_audio(df)
-                        st.success(f"✓ {len(df)} sentences loaded")
+                        st.session_state.loaded_upload_id = uploaded_file.file_id
+                        st.success(f"✓ {len(deck)} sentences loaded")
+                else:
+                    st.session_state.loaded_upload_id = uploaded_file.file_id
+
+        elif input_method == "Library":
+            # 한 번 불러온 덱은 파싱/오디오 생성 없이 바로 불러옴
+            library_decks = list_library_decks()
+            if library_decks:
+                library_choice = st.selectbox(
+                    "Saved decks",
+                    library_decks,
+                    format_func=lambda entry: f"{entry['name']} ({entry['rows']})",
+                    label_visibility="collapsed"
+                )
+                if st.button("LOAD", use_container_width=True):
+                    deck = load_from_library(library_choice['id'])
+                    if deck is not None:
+                        st.session_state.loaded_file_id = library_choice['id']
+                        st.success(f"✓ {len(deck)} sentences loaded")
+            else:
+                st.caption("No saved decks yet. Uploaded files are saved here.")
 
         else:
             english_text = st.text_area(
@@ -709,15 +779,30 @@ def main():
 
             if st.button("LOAD", use_container_width=True):
                 if english_text.strip():
-                    df = parse_text_input(english_text, False, "")
-                    if df is not None:
-                        st.session_state.df = df
+                    # 이전에 붙여넣은 덱과 비교해 추가/변경된 줄만 새로 합성
+                    deck, changed = load_text_deck(english_text)
+                    if deck is not None:
                         st.session_state.loaded_file_id = f"text_{hash(english_text)}"
-                        pregenerate_audio(df)
-                        st.success(f"✓ {len(df)} loaded")
+                        st.success(f"✓ {len(deck)} loaded ({changed} new)")
                 else:
                     st.warning("Enter sentences")
 
+        # 원본 시간으로 이동 (Time 열이나 자막 큐 시간이 있는 덱)
+        if st.session_state.time_index is not None:
+            jump_col, go_col = st.columns([2, 1])
+            with jump_col:
+                jump_seconds = st.number_input(
+                    "Jump to time (s)",
+                    min_value=0.0,
+                    value=0.0,
+                    step=1.0,
+                    format="%.1f"
+                )
+            with go_col:
+                st.write("")
+                if st.button("GO", use_container_width=True):
+                    st.session_state.current_index = get_row_at_time(jump_seconds)
+
         st.divider()
 
         # 재생 모드
@@ -741,6 +826,17 @@ def main():
         )
         st.session_state.playback_speed = playback_speed
 
+        # 오디오 구성 (영어만 / 영어 → 한국어 / 한국어 → 영어 → 영어)
+        pattern_labels = {'en': "EN", 'en-ko': "EN → KO", 'ko-en-en': "KO → EN → EN"}
+        audio_pattern = st.selectbox(
+            "Audio",
+            list(AUDIO_PATTERNS),
+            index=list(AUDIO_PATTERNS).index(st.session_state.audio_pattern),
+            format_func=pattern_labels.get
+        )
+        if audio_pattern != st.session_state.audio_pattern:
+            set_audio_pattern(audio_pattern)
+
         # 모드별 설정
         if repeat_mode == "Individual":
             target_repeats = st.number_input(
@@ -769,6 +865,12 @@ def main():
                 value=st.session_state.shadowing_delay
             )
             st.session_state.shadowing_delay = shadowing_delay
+            shadowing_scale = st.checkbox(
+                "+ sentence length",
+                value=st.session_state.shadowing_scale,
+                help="문장 길이만큼 따라 말할 시간을 더합니다"
+            )
+            st.session_state.shadowing_scale = shadowing_scale
 
         st.divider()
 
@@ -779,7 +881,7 @@ def main():
             st.rerun()
 
     # ========== 메인 영역 ==========
-    if st.session_state.df is None:
+    if st.session_state.deck is None:
         st.markdown("""
         <div style="text-align: center; margin-top: 100px;">
             <h1 style="color: #00ff00; font-family: Courier New, monospace; text-shadow: 0 0 10px rgba(0, 255, 0, 0.8);">
@@ -792,13 +894,18 @@ def main():
         """, unsafe_allow_html=True)
         return
 
-    df = st.session_state.df
+    deck = st.session_state.deck
+
+    # 백그라운드에서 준비된 오디오를 세션 캐시에 반영
+    generation_job = sync_generated_audio(deck)
+
     current_idx = st.session_state.current_index
-    if current_idx >= len(df):
+    if current_idx >= len(deck):
         current_idx = 0
         st.session_state.current_index = 0
 
-    current_sentence = df.iloc[current_idx]
+    current_english = deck.english[current_idx]
+    current_korean = deck.korean[current_idx]
 
     # Create two-column layout using Streamlit columns
     col_player, col_playlist = st.columns([2, 1], gap="medium")
@@ -809,24 +916,20 @@ def main():
         st.markdown('<div class="winamp-player">', unsafe_allow_html=True)
 
         # 헤더
-        st.markdown(f'<div class="winamp-header"><span class="winamp-title">ENGLISH PRACTICE PLAYER</span><span class="winamp-title">{current_idx + 1} of {len(df)}</span></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="winamp-header"><span class="winamp-title">ENGLISH PRACTICE PLAYER</span><span class="winamp-title">{current_idx + 1} of {len(deck)}</span></div>', unsafe_allow_html=True)
 
         # 디스플레이
         st.markdown('<div class="winamp-display">', unsafe_allow_html=True)
 
         # 현재 문장의 오디오 길이 표시
-        if current_idx in st.session_state.audio_durations:
-            duration_sec = int(st.session_state.audio_durations[current_idx])
-            time_display = f"{duration_sec // 60:02d}:{duration_sec % 60:02d}"
-        else:
-            time_display = "00:00"
-
-        st.markdown(f'<div class="winamp-time">{time_display}</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="winamp-text">{current_sentence["English"]}</div>', unsafe_allow_html=True)
-        if current_sentence['Korean']:
-            st.markdown(f'<div class="winamp-text-korean">{current_sentence["Korean"]}</div>', unsafe_allow_html=True)
-
-        # 비주얼라이저 추가
+        st.markdown(f'<div class="winamp-time">{deck.durations[current_idx]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="winamp-text">{current_english}</div>', unsafe_allow_html=True)
+        if current_korean:
+            st.markdown(f'<div class="winamp-text-korean">{current_korean}</div>', unsafe_allow_html=True)
+
+        # 비주얼라이저: 캐시에 저장된 파형 요약이 있으면 실제 파형, 없으면 장식용 막대
+        visualizer_placeholder = st.empty()
+        peaks = get_row_peaks(current_idx)
         visualizer_html = '''
         <div class="visualizer">
             <div class="viz-bar"></div>
@@ -840,7 +943,9 @@ def main():
             <div class="viz-bar"></div>
         </div>
         '''
-        st.markdown(visualizer_html, unsafe_allow_html=True)
+        if peaks is not None:
+            visualizer_html = render_waveform(peaks)
+        visualizer_placeholder.markdown(visualizer_html, unsafe_allow_html=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -854,82 +959,170 @@ def main():
         # Winamp 스타일 버튼 컨테이너
         st.markdown('<div class="winamp-controls-container">', unsafe_allow_html=True)
 
+        # Loop All / Shadowing에서는 아래 덱 트랙이 자동 재생되므로, 문장 오디오가 겹치지 않도록 문장 단위 재생 버튼을 끔
+        deck_mode = st.session_state.repeat_mode in ("Loop All", "Shadowing")
+
         btn_col1, btn_col2, btn_col3 = st.columns([1, 1.5, 1])
 
         with btn_col1:
-            if st.button("⏮", use_container_width=True, help="이전 문장"):
+            if st.button("⏮", use_container_width=True, help="이전 문장", disabled=deck_mode):
                 if st.session_state.current_index > 0:
                     st.session_state.current_index -= 1
                 else:
-                    st.session_state.current_index = len(df) - 1
+                    st.session_state.current_index = len(deck) - 1
                 st.rerun()
 
         with btn_col2:
-            if st.button("▶️", use_container_width=True, help="재생", type="primary"):
-                play_audio_with_stats_v2(
-                    current_sentence['English'],
+            if st.button("▶️", use_container_width=True, help="재생", type="primary", disabled=deck_mode):
+                duration = play_audio_with_stats_v2(
+                    current_english,
                     current_idx,
                     st.session_state.playback_speed,
-                    audio_placeholder
+                    audio_placeholder,
+                    korean=current_korean,
+                    pattern=st.session_state.audio_pattern
                 )
 
+                # 파형이 문장 오디오와 정확히 맞을 때만 재생 위치를 표시
+                peaks = get_row_peaks(current_idx)
+                if peaks is not None and st.session_state.audio_pattern == 'en':
+                    visualizer_placeholder.markdown(render_waveform(peaks, duration), unsafe_allow_html=True)
+
         with btn_col3:
-            if st.button("⏭", use_container_width=True, help="다음 문장"):
-                st.session_state.current_index = (st.session_state.current_index + 1) % len(df)
+            if st.button("⏭", use_container_width=True, help="다음 문장", disabled=deck_mode):
+                st.session_state.current_index = (st.session_state.current_index + 1) % len(deck)
                 st.rerun()
 
         st.markdown('</div>', unsafe_allow_html=True)
 
+        # Loop All / Shadowing: 덱 전체를 하나의 트랙으로 끊김 없이 재생
+        # (Shadowing은 문장마다 따라 말할 무음이 들어간 트랙)
+        if deck_mode and generation_job is not None and not generation_job.done:
+            st.info(f"⏳ 덱 오디오 준비 중... {generation_job.completed}/{generation_job.total}")
+        elif deck_mode:
+            shadowing = st.session_state.repeat_mode == "Shadowing"
+            try:
+                cues, missing = play_deck_loop(
+                    deck,
+                    st.session_state.playback_speed,
+                    st.session_state.loop_target if not shadowing else 1,
+                    gap=st.session_state.shadowing_delay if shadowing else 0.0,
+                    gap_scale=1.0 if shadowing and st.session_state.shadowing_scale else 0.0,
+                    pattern=st.session_state.audio_pattern
+                )
+            except Exception as e:
+                st.error(f"덱 오디오 생성 실패: {str(e)}")
+                cues, missing = [], []
+
+            # 오디오 생성에 실패한 문장은 트랙에서 빠지므로 알리고 다시 생성할 수 있게 함
+            if missing:
+                numbers = ", ".join(str(i + 1) for i in missing[:10]) + (" ..." if len(missing) > 10 else "")
+                st.warning(f"⚠ 오디오가 없는 {len(missing)}개 문장을 건너뜁니다: {numbers}")
+                if st.button("↻ RETRY FAILED", use_container_width=True):
+                    start_audio_generation(deck, korean=st.session_state.audio_pattern != 'en')
+                    st.rerun()
+
+            if cues:
+                st.download_button(
+                    "⬇ SUBTITLES (VTT)",
+                    cues_to_vtt(cues),
+                    file_name="deck.vtt",
+                    mime="text/vtt",
+                    use_container_width=True
+                )
+
     # ========== RIGHT COLUMN: Playlist Section ==========
     with col_playlist:
         # Playlist header
         st.markdown(f'''
         <div style="background: var(--bg-card); border-radius: 16px 16px 0 0; padding: 16px 20px; border-bottom: 1px solid rgba(255, 255, 255, 0.1); margin-top: 10px;">
             <div style="color: var(--text-accent); font-weight: 700; font-family: 'JetBrains Mono', monospace; font-size: 12px; text-transform: uppercase; letter-spacing: 2px;">
-                PLAYLIST • {len(df)} TRACKS
+                PLAYLIST • {len(deck)} TRACKS
             </div>
         </div>
         ''', unsafe_allow_html=True)
 
-        # Create scrollable container for playlist items
-        st.markdown('<div class="mejs__playlist" style="max-height: 500px; overflow-y: auto; margin-top: 0; padding: 0;">', unsafe_allow_html=True)
+        if generation_job is not None and not generation_job.done:
+            render_playlist_live(deck)
+        else:
+            render_playlist(deck)
 
-        # Display each sentence as a clickable item
-        for idx, row in df.iterrows():
-            is_current = idx == st.session_state.current_index
 
-            # Get duration
-            if idx in st.session_state.audio_durations:
-                duration_sec = int(st.session_state.audio_durations[idx])
-                timestamp = f"{duration_sec // 60:02d}:{duration_sec % 60:02d}"
-            else:
-                timestamp = "00:00"
+@st.fragment(run_every=1.0)
+def render_playlist_live(deck):
+    """
+    백그라운드 생성 중에 진행률과 플레이리스트의 문장별 준비 상태(⏳/✓/⚠)를 1초마다 갱신합니다.
+    작업이 끝나면 앱 전체를 한 번 다시 실행해 덱 재생(Loop All / Shadowing)을 갱신하고,
+    그 뒤로는 갱신하지 않는 render_playlist로 그립니다.
+    """
+    _render_generation_progress(deck)
+    _render_playlist(deck)
 
-            # Create button label with sentence info
-            english_text = row["English"]
-            korean_text = row.get("Korean", "")
 
-            # Truncate if too long
-            if len(english_text) > 50:
-                display_english = english_text[:47] + "..."
-            else:
-                display_english = english_text
-
-            button_label = f"{idx + 1}. {display_english}"
-
-            # Create clickable button
-            button_type = "primary" if is_current else "secondary"
-            if st.button(
-                button_label,
-                key=f"playlist_{idx}",
-                help=f"{english_text}\n{korean_text}\n[{timestamp}]",
-                use_container_width=True,
-                type=button_type
-            ):
-                st.session_state.current_index = idx
-                st.rerun()
+def _render_generation_progress(deck):
+    """준비된 오디오를 세션에 반영하고 생성 진행률을 표시합니다. 작업이 끝났으면 앱 전체를 다시 실행합니다."""
+    generation_job = sync_generated_audio(deck)
+    if generation_job is None or generation_job.done:
+        st.rerun(scope="app")
 
-        st.markdown('</div>', unsafe_allow_html=True)
+    if is_tts_paused():
+        progress_text = f"⏸ TTS 요청 제한으로 잠시 대기 중... {generation_job.completed}/{generation_job.total}"
+    else:
+        progress_text = f"⏳ 오디오 생성 중... {generation_job.completed}/{generation_job.total}"
+    st.progress(generation_job.completed / max(generation_job.total, 1), text=progress_text)
+
+
+def _render_playlist(deck):
+    """문장 목록을 오디오 준비 상태와 함께 클릭 가능한 버튼으로 표시합니다."""
+
+    # Create scrollable container for playlist items
+    st.markdown('<div class="mejs__playlist" style="max-height: 500px; overflow-y: auto; margin-top: 0; padding: 0;">', unsafe_allow_html=True)
+
+    # 검색어가 있으면 일치하는 문장만 표시하고, 그 문장들만 모아 연습할 수 있음
+    if st.session_state.practice_parent is not None:
+        if st.button("⟲ FULL DECK", use_container_width=True, help="검색 결과 연습을 끝내고 전체 덱으로 돌아갑니다"):
+            end_practice_set()
+            st.rerun()
+
+    query = st.text_input("Search", placeholder="🔍 Search sentences...", label_visibility="collapsed")
+    if query.strip():
+        rows = search_deck(query)
+        st.caption(f"{len(rows)} matches")
+        if rows and st.button(f"▶ PRACTICE {len(rows)} MATCHES", use_container_width=True):
+            start_practice_set(rows)
+            st.rerun()
+    else:
+        rows = range(len(deck))
+
+    # Display each sentence as a clickable item
+    # (표시 문장과 재생 시간 문자열은 덱에 미리 계산되어 있음)
+    for idx in rows:
+        is_current = idx == st.session_state.current_index
+
+        # 오디오 준비 상태
+        status = get_generation_status(idx)
+        status_icon = {"ready": "✓", "pending": "⏳", "failed": "⚠"}[status]
+
+        button_label = f"{status_icon} {idx + 1}. {deck.labels[idx]}"
+
+        # Create clickable button
+        button_type = "primary" if is_current else "secondary"
+        if st.button(
+            button_label,
+            key=f"playlist_{idx}",
+            help=f"{deck.english[idx]}\n{deck.korean[idx]}\n[{deck.durations[idx]}] {status}",
+            use_container_width=True,
+            type=button_type
+        ):
+            st.session_state.current_index = idx
+            st.rerun()
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+# 플레이리스트만 다시 그리는 fragment: 검색과 문장 선택, 생성 중 상태 갱신 때 플레이어 영역은
+# 다시 그리지 않으므로 재생 중인 오디오가 끊기지 않습니다.
+render_playlist = st.fragment(_render_playlist)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Small HTTP server for cached sentence audio
+캐시된 문장 오디오를 HTTP로 제공하는 작은 서버
+
+base64 data URI 대신 내용 해시가 들어간 고정 URL로 오디오를 제공하여
+브라우저가 캐시할 수 있도록 합니다. ETag(If-None-Match)와 Range 요청을 지원합니다.
+"""
+
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# /audio/<캐시 키>/<ETag>.<확장자>
+_PATH_PATTERN = re.compile(r'^/audio/([0-9a-f]{64})/([0-9a-f]+)\.\w+$')
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# URL에 내용 해시가 들어가므로 같은 URL의 내용은 바뀌지 않음
+_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_EXTENSIONS = {
+    'audio/mpeg': 'mp3',
+    'audio/ogg': 'ogg',
+    'audio/mp4': 'm4a',
+}
+
+
+def _parse_range(header: str, size: int):
+    """
+    단일 Range 헤더를 해석합니다.
+
+    Returns:
+        tuple: (시작, 끝) 포함 구간, 범위를 만족할 수 없으면 None
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+    if start == '':
+        # 접미사 범위: 마지막 N바이트
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class _AudioRequestHandler(BaseHTTPRequestHandler):
+    """캐시 키와 ETag로 오디오를 찾아 응답하는 핸들러"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def log_message(self, format, *args):
+        # Streamlit 로그가 요청 로그로 가득 차지 않도록 출력하지 않음
+        pass
+
+    def _send_empty(self, status: HTTPStatus, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _serve(self, send_body: bool):
+        match = _PATH_PATTERN.match(self.path.split('?', 1)[0])
+        entry = self.server.lookup(match.group(1)) if match else None
+        if entry is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+
+        data, meta = entry
+        etag = meta['etag']
+        if etag != match.group(2):
+            # 내용이 바뀐 옛 URL
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': _CACHE_CONTROL,
+            'Accept-Ranges': 'bytes',
+            'Access-Control-Allow-Origin': '*',
+        }
+
+        if_none_match = self.headers.get('If-None-Match', '')
+        if etag in if_none_match or if_none_match.strip() == '*':
+            self._send_empty(HTTPStatus.NOT_MODIFIED, headers)
+            return
+
+        size = len(data)
+        status = HTTPStatus.OK
+        body = data
+
+        range_header = self.headers.get('Range')
+        if range_header and ',' not in range_header:
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                headers['Content-Range'] = f'bytes */{size}'
+                self._send_empty(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers)
+                return
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+            body = data[start:end + 1]
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', meta.get('mime', 'application/octet-stream'))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class AudioServer:
+    """
+    백그라운드 스레드에서 동작하는 오디오 HTTP 서버.
+
+    Args:
+        lookup: 캐시 키를 받아 (데이터 bytes, 메타데이터 dict) 또는 None을 반환하는 함수.
+                메타데이터에는 'etag'와 'mime'이 있어야 합니다.
+        host: 바인딩할 주소
+        port: 바인딩할 포트
+        public_url: 브라우저가 접근할 기본 URL (예: http://localhost:8765)
+    """
+
+    def __init__(self, lookup, host: str, port: int, public_url: str):
+        self.public_url = public_url.rstrip('/')
+
+        self._httpd = ThreadingHTTPServer((host, port), _AudioRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.lookup = lookup
+
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name='audio-server', daemon=True
+        )
+        self._thread.start()
+
+    def url_for(self, key: str, meta: dict) -> str:
+        """캐시 항목의 고정 URL을 반환합니다."""
+        extension = _EXTENSIONS.get(meta.get('mime'), 'bin')
+        return f"{self.public_url}/audio/{key}/{meta['etag']}.{extension}"
+
+    def stop(self):
+        """서버를 종료합니다."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,79 @@
+"""
+Process-wide in-memory audio store
+모든 세션이 공유하는 내용 주소 기반 메모리 오디오 저장소
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class AudioStore:
+    """
+    프로세스 전체에서 한 번만 오디오를 보관하는 LRU 메모리 저장소.
+
+    세션은 오디오 bytes 대신 캐시 키만 들고 있고, 실제 데이터는 이 저장소에서
+    전체 바이트 예산 안에서 공유됩니다. 메모리에 없는 항목은 loader(보통 디스크 캐시)에서
+    읽어와 채웁니다.
+
+    Args:
+        max_bytes: 저장소 전체 바이트 예산
+        loader: 캐시 키를 받아 (데이터 bytes, 메타데이터 dict) 또는 None을 반환하는 함수
+    """
+
+    def __init__(self, max_bytes: int, loader=None):
+        self.max_bytes = max_bytes
+        self._loader = loader
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {key: (data, meta)}, 오래된 항목이 앞쪽
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str):
+        """
+        항목을 찾습니다. 메모리에 없으면 loader에서 읽어 저장합니다.
+
+        Returns:
+            tuple: (데이터 bytes, 메타데이터 dict), 없으면 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if self._loader is None:
+            return None
+        entry = self._loader(key)
+        if entry is not None:
+            self.put(key, *entry)
+        return entry
+
+    def put(self, key: str, data: bytes, meta: dict):
+        """항목을 저장하고, 예산을 넘으면 오래된 항목부터 제거합니다."""
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old[0])
+
+            self._entries[key] = (data, meta)
+            self._total_bytes += len(data)
+
+            while self._total_bytes > self.max_bytes:
+                _, (old_data, _) = self._entries.popitem(last=False)
+                self._total_bytes -= len(old_data)
@@ -0,0 +1,136 @@
+"""
+Runtime configuration for English sentence practice app
+영어 문장 반복 연습 프로그램 설정값 (환경 변수로 재정의 가능)
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """정수형 환경 변수를 읽습니다."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# ============================================================
+# 오디오 생성
+# ============================================================
+
+# 사용할 TTS 백엔드: 'gtts'(기본), 'local'(오프라인), 'fake'(지연 주입 벤치마크용)
+TTS_BACKEND = os.environ.get('TTS_BACKEND', 'gtts')
+
+# 'fake' 백엔드의 요청당 지연 시간과 흔들림 (밀리초)
+FAKE_TTS_LATENCY_MS = _env_int('FAKE_TTS_LATENCY_MS', 300)
+FAKE_TTS_JITTER_MS = _env_int('FAKE_TTS_JITTER_MS', 100)
+
+# 'fake' 백엔드가 요청 제한(429) 오류를 흉내내는 비율 (퍼센트)
+FAKE_TTS_ERROR_RATE = _env_int('FAKE_TTS_ERROR_RATE', 0)
+
+# 백그라운드 오디오 생성 작업에서 동시에 실행할 TTS 요청 수 (1이면 순차 생성)
+TTS_MAX_WORKERS = _env_int('TTS_MAX_WORKERS', 8)
+
+# 긴 문장을 gTTS 토큰(약 100자) 단위로 나눠 동시에 요청할 수 (문장당, 1이면 순차 요청)
+TTS_CHUNK_WORKERS = _env_int('TTS_CHUNK_WORKERS', 4)
+
+# TTS 요청 속도 제한 (분당 요청 수, 한 번에 몰아 보낼 수 있는 요청 수)
+TTS_RATE_PER_MIN = _env_int('TTS_RATE_PER_MIN', 600)
+TTS_RATE_BURST = _env_int('TTS_RATE_BURST', 10)
+
+# 실패한 TTS 요청의 재시도 횟수와 지수 백오프 대기 시간 (밀리초)
+TTS_MAX_RETRIES = _env_int('TTS_MAX_RETRIES', 4)
+TTS_BACKOFF_BASE_MS = _env_int('TTS_BACKOFF_BASE_MS', 500)
+TTS_BACKOFF_MAX_MS = _env_int('TTS_BACKOFF_MAX_MS', 30000)
+
+# 연속 실패가 이 횟수를 넘으면 요청을 멈추고 기다리는 시간 (밀리초)
+TTS_BREAKER_THRESHOLD = _env_int('TTS_BREAKER_THRESHOLD', 5)
+TTS_BREAKER_COOLDOWN_MS = _env_int('TTS_BREAKER_COOLDOWN_MS', 30000)
+
+# 브레이커가 열린 동안 문장 하나에 허용하는 시험 요청 실패 수 (넘으면 그 문장은 실패 처리)
+TTS_BREAKER_MAX_PROBES = _env_int('TTS_BREAKER_MAX_PROBES', 3)
+
+# 재생 버튼처럼 화면이 기다리는 요청의 최대 대기 시간 (밀리초, 넘으면 바로 오류 표시)
+TTS_INTERACTIVE_TIMEOUT_MS = _env_int('TTS_INTERACTIVE_TIMEOUT_MS', 15000)
+
+# TTS 기본 언어와 음성 (gTTS에서는 음성 대신 악센트를 결정하는 tld)
+TTS_LANG = os.environ.get('TTS_LANG', 'en')
+TTS_VOICE = os.environ.get('TTS_VOICE', 'com')
+
+# 덱의 Korean 컬럼을 합성할 때 쓰는 언어 코드
+TTS_KOREAN_LANG = os.environ.get('TTS_KOREAN_LANG', 'ko')
+
+
+# ============================================================
+# 오디오 디스크 캐시
+# ============================================================
+
+AUDIO_CACHE_DIR = os.environ.get(
+    'AUDIO_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'eng-practice', 'audio'),
+)
+AUDIO_CACHE_MAX_BYTES = _env_int('AUDIO_CACHE_MAX_MB', 512) * 1024 * 1024
+
+# 속도 변환 등 기본 오디오에서 파생된 변형은 별도 용량으로 따로 제거
+AUDIO_VARIANT_CACHE_DIR = os.environ.get(
+    'AUDIO_VARIANT_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'eng-practice', 'variants'),
+)
+AUDIO_VARIANT_CACHE_MAX_BYTES = _env_int('AUDIO_VARIANT_CACHE_MAX_MB', 256) * 1024 * 1024
+
+# 모든 세션이 공유하는 메모리 오디오 저장소의 전체 예산
+AUDIO_MEMORY_MAX_BYTES = _env_int('AUDIO_MEMORY_MAX_MB', 128) * 1024 * 1024
+
+
+# ============================================================
+# 오디오 후처리
+# ============================================================
+
+# 합성 직후 앞뒤 무음을 잘라내고 음량을 맞춘 뒤 캐시에 저장 (ffmpeg 필요, 없으면 처리하지 않은 원본을 원본 키로 저장)
+AUDIO_POSTPROCESS_ENABLED = os.environ.get('AUDIO_POSTPROCESS_ENABLED', '1') == '1'
+
+# 무음으로 볼 에너지 기준과 발화 구간의 목표 음량 (dBFS)
+AUDIO_SILENCE_THRESHOLD_DB = _env_int('AUDIO_SILENCE_THRESHOLD_DB', -40)
+AUDIO_TARGET_LOUDNESS_DB = _env_int('AUDIO_TARGET_LOUDNESS_DB', -20)
+
+# 속도 변경을 브라우저 playbackRate 대신 서버에서 음높이를 유지하며 렌더링 (ffmpeg 필요)
+TIME_STRETCH_ENABLED = os.environ.get('TIME_STRETCH_ENABLED', '0') == '1'
+
+# 캐시를 채울 때 함께 만들 저비트레이트 음성 형식 (예: 'opus,aac', 비우면 MP3만 사용, ffmpeg 필요)
+TRANSCODE_FORMATS = [
+    fmt.strip() for fmt in os.environ.get('TRANSCODE_FORMATS', '').split(',') if fmt.strip()
+]
+
+
+# ============================================================
+# 오디오 HTTP 서버
+# ============================================================
+
+# 브라우저에서 접근할 오디오 서버 주소 (예: 리버스 프록시로 Streamlit과 같은 호스트의 https 경로에 연결한 주소).
+# 브라우저가 서버 컴퓨터의 localhost에 접근할 수 없고, HTTPS 페이지에서는 http 오디오가 막히므로
+# 지정한 경우에만 서버를 켭니다. 비활성화하면 오디오를 base64 data URI로 페이지에 직접 넣습니다.
+AUDIO_SERVER_PUBLIC_URL = os.environ.get('AUDIO_SERVER_PUBLIC_URL', '')
+AUDIO_SERVER_ENABLED = os.environ.get('AUDIO_SERVER_ENABLED', '1' if AUDIO_SERVER_PUBLIC_URL else '0') == '1'
+
+# 기본값은 외부에 열지 않고 리버스 프록시만 접근하도록 루프백에 바인딩
+AUDIO_SERVER_HOST = os.environ.get('AUDIO_SERVER_HOST', '127.0.0.1')
+AUDIO_SERVER_PORT = _env_int('AUDIO_SERVER_PORT', 8765)
+
+# 주소 없이 직접 켠 경우(AUDIO_SERVER_ENABLED=1)는 같은 컴퓨터의 브라우저에서만 쓰는 로컬 개발용
+if AUDIO_SERVER_ENABLED and not AUDIO_SERVER_PUBLIC_URL:
+    AUDIO_SERVER_PUBLIC_URL = f'http://localhost:{AUDIO_SERVER_PORT}'
+
+
+# ============================================================
+# 덱 불러오기
+# ============================================================
+
+# CSV를 나눠 읽을 행 수 (메모리 사용량의 상한을 결정)
+CSV_CHUNK_ROWS = _env_int('CSV_CHUNK_ROWS', 5000)
+
+# 모든 세션이 공유하는 파싱된 덱 캐시의 최대 항목 수 (파일 내용 해시 기준)
+DECK_CACHE_MAX_ENTRIES = _env_int('DECK_CACHE_MAX_ENTRIES', 32)
+
+# 업로드한 덱을 보관하는 SQLite 덱 라이브러리 파일
+DECK_LIBRARY_PATH = os.environ.get(
+    'DECK_LIBRARY_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'eng-practice', 'decks.sqlite3'),
+)
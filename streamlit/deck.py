@@ -0,0 +1,118 @@
+"""
+Compact columnar deck
+세션마다 보관하는 문장 덱의 열 기반 표현
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+# 플레이리스트에 표시할 영어 문장 최대 길이
+LABEL_MAX_CHARS = 50
+
+
+def truncate_label(text: str, max_chars: int = LABEL_MAX_CHARS) -> str:
+    """문장이 max_chars보다 길면 잘라서 '...'을 붙입니다."""
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 3] + "..."
+
+
+def format_duration(seconds) -> str:
+    """재생 시간(초)을 'MM:SS' 문자열로 변환합니다 (없으면 '00:00')."""
+    if seconds is None:
+        return "00:00"
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class Deck:
+    """
+    pandas DataFrame 대신 세션에 보관하는 덱.
+
+    열마다 문자열 튜플 하나만 두고, 플레이리스트에 필요한 행별 메타데이터
+    (잘라낸 표시 문장, 재생 시간 문자열, 내용 해시)를 불러올 때 한 번만 계산합니다.
+    스크립트가 다시 실행될 때 행마다 Series를 만들지 않고 순번으로 바로 읽습니다.
+
+    Args:
+        english: 행별 영어 문장
+        korean: 행별 한국어 번역 (없으면 빈 문자열)
+        hashes: 행별 text_hash
+        times: 행별 시작 시간(초) float 배열 (NaN은 시간 없음), Time 정보가 없으면 None
+    """
+
+    __slots__ = ('english', 'korean', 'hashes', 'times', 'labels', 'durations', '_key')
+
+    def __init__(self, english, korean, hashes, times=None):
+        self.english = tuple(english)
+        self.korean = tuple(korean)
+        self.hashes = tuple(hashes)
+        self.times = times
+        self.labels = tuple(truncate_label(text) for text in self.english)
+        # 오디오가 준비되면 set_duration으로 채움
+        self.durations = [format_duration(None)] * len(self.english)
+        self._key = None
+
+    @classmethod
+    def from_frame(cls, df, hashes) -> 'Deck':
+        """
+        English(, Korean, Time) 열이 있는 DataFrame으로 덱을 만듭니다.
+
+        Args:
+            df: pandas DataFrame
+            hashes: 행별 text_hash
+        """
+        english = df['English'].astype(str)
+        korean = df['Korean'].fillna('').astype(str) if 'Korean' in df.columns else [''] * len(df)
+        times = pd.to_numeric(df['Time'], errors='coerce').to_numpy(dtype=float) if 'Time' in df.columns else None
+        return cls(english, korean, hashes, times)
+
+    def __len__(self) -> int:
+        return len(self.english)
+
+    @property
+    def key(self) -> str:
+        """덱 내용(행별 해시와 번역)의 해시. 검색 색인 등 덱 단위 캐시의 키로 사용합니다."""
+        if self._key is None:
+            digest = hashlib.sha256()
+            for h, korean in zip(self.hashes, self.korean):
+                digest.update(f"{h}\t{korean}\n".encode('utf-8'))
+            self._key = digest.hexdigest()
+        return self._key
+
+    def subset(self, rows) -> 'Deck':
+        """
+        rows 순번의 행만 모은 새 덱을 만듭니다 (해시와 재생 시간 표시는 그대로 옮김).
+
+        Args:
+            rows: 행 순번 목록
+        """
+        rows = list(rows)
+        times = self.times[rows] if self.times is not None else None
+        deck = Deck([self.english[i] for i in rows], [self.korean[i] for i in rows],
+                    [self.hashes[i] for i in rows], times)
+        deck.durations = [self.durations[i] for i in rows]
+        return deck
+
+    def set_duration(self, index: int, seconds: float):
+        """index번째 문장의 재생 시간 표시 문자열을 갱신합니다."""
+        self.durations[index] = format_duration(seconds)
+
+    def time_index(self):
+        """
+        시작 시간 → 행 검색용 정렬 인덱스를 만듭니다.
+
+        Returns:
+            tuple: (정렬된 시작 시간 list, 같은 순서의 행 순번 list), 시간 정보가 없으면 None
+        """
+        if self.times is None:
+            return None
+
+        rows = np.flatnonzero(~np.isnan(self.times))
+        if len(rows) == 0:
+            return None
+
+        order = np.argsort(self.times[rows], kind='stable')
+        return self.times[rows][order].tolist(), rows[order].tolist()
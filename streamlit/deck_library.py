@@ -0,0 +1,166 @@
+"""
+Persistent deck library backed by SQLite
+한 번 불러온 덱을 세션과 재시작에 관계없이 보관하는 SQLite 덱 라이브러리
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from deck import Deck
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS deck_rows (
+    deck_id TEXT NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    english TEXT NOT NULL,
+    korean TEXT NOT NULL,
+    start_time REAL,
+    text_hash TEXT NOT NULL,
+    audio_key TEXT NOT NULL,
+    duration REAL,
+    PRIMARY KEY (deck_id, position)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS decks_last_used ON decks(last_used_at DESC);
+"""
+
+
+class DeckLibrary:
+    """
+    덱과 행, 행별 내용 해시, 오디오 디스크 캐시 키를 저장하는 SQLite 라이브러리.
+
+    WAL 모드로 열어 여러 세션(과 프로세스)이 쓰는 동안에도 읽기가 막히지 않습니다.
+    덱은 업로드 파일 내용 해시로 식별하므로 같은 파일은 한 번만 저장되고,
+    오디오가 준비되면 행별 재생 시간을 함께 기록해 다음에 불러올 때 바로 재생할 수 있습니다.
+
+    Args:
+        path: 데이터베이스 파일 경로
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+
+    def __contains__(self, deck_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM decks WHERE id = ?', (deck_id,)).fetchone()
+        return row is not None
+
+    def list_decks(self) -> list:
+        """
+        저장된 덱 목록을 최근 사용 순으로 반환합니다.
+
+        Returns:
+            list: {'id', 'name', 'rows', 'last_used_at'} dict 목록
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, name, row_count, last_used_at FROM decks ORDER BY last_used_at DESC'
+            ).fetchall()
+        return [{'id': id_, 'name': name, 'rows': count, 'last_used_at': used} for id_, name, count, used in rows]
+
+    def save(self, deck_id: str, name: str, voice: str, deck: Deck, audio_keys, durations=None):
+        """
+        덱을 저장합니다. 같은 id의 덱이 있으면 통째로 바꿉니다.
+
+        Args:
+            deck_id: 덱 식별자 (업로드 파일 내용 해시)
+            name: 표시 이름 (파일 이름)
+            voice: 오디오 키를 만든 TTS 음성 (음성이 바뀌면 저장된 오디오 키를 쓰지 않음)
+            deck: 저장할 덱
+            audio_keys: 행별 오디오 디스크 캐시 키
+            durations: 행별 재생 시간(초) 목록, 모르면 None
+        """
+        durations = durations or [None] * len(deck)
+        times = deck.times if deck.times is not None else [math.nan] * len(deck)
+        now = time.time()
+        rows = [
+            (deck_id, i, english, korean, None if math.isnan(start) else float(start), h, key, duration)
+            for i, (english, korean, start, h, key, duration)
+            in enumerate(zip(deck.english, deck.korean, times, deck.hashes, audio_keys, durations))
+        ]
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM decks WHERE id = ?', (deck_id,))
+                self._conn.execute(
+                    'INSERT INTO decks (id, name, voice, row_count, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (deck_id, name, voice, len(deck), now, now),
+                )
+                self._conn.executemany('INSERT INTO deck_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def load(self, deck_id: str):
+        """
+        덱을 불러오고 최근 사용 시각을 갱신합니다.
+
+        Returns:
+            tuple: (Deck, {'name', 'voice', 'audio_keys', 'durations'}), 없으면 None
+        """
+        with self._lock:
+            header = self._conn.execute('SELECT name, voice FROM decks WHERE id = ?', (deck_id,)).fetchone()
+            if header is None:
+                return None
+            rows = self._conn.execute(
+                'SELECT english, korean, start_time, text_hash, audio_key, duration '
+                'FROM deck_rows WHERE deck_id = ? ORDER BY position',
+                (deck_id,),
+            ).fetchall()
+            self._conn.execute('UPDATE decks SET last_used_at = ? WHERE id = ?', (time.time(), deck_id))
+
+        english, korean, times, hashes, audio_keys, durations = zip(*rows) if rows else [()] * 6
+        times = np.array([math.nan if t is None else t for t in times], dtype=float)
+        deck = Deck(english, korean, hashes, times if np.any(~np.isnan(times)) else None)
+        name, voice = header
+        return deck, {'name': name, 'voice': voice, 'audio_keys': list(audio_keys), 'durations': list(durations)}
+
+    def record_durations(self, deck_id: str, durations: dict):
+        """
+        오디오가 준비된 행의 재생 시간을 기록합니다.
+
+        Args:
+            deck_id: 덱 식별자
+            durations: {행 순번: 재생 시간(초)}
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'UPDATE deck_rows SET duration = ? WHERE deck_id = ? AND position = ?',
+                    [(duration, deck_id, i) for i, duration in durations.items()],
+                )
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def delete(self, deck_id: str):
+        """덱과 행을 삭제합니다 (오디오 캐시는 그대로 둠)."""
+        with self._lock:
+            self._conn.execute('DELETE FROM decks WHERE id = ?', (deck_id,))
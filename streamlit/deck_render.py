@@ -0,0 +1,119 @@
+"""
+Whole-deck audio rendering
+덱 전체를 하나의 오디오 트랙과 큐 시트로 만드는 함수들 (SRT/WebVTT 자막 변환 포함)
+"""
+
+import re
+
+from mp3 import join_mp3, mp3_duration_us, silence_like
+
+
+def render_deck(clips, texts, gap: float = 0.0, gap_scale: float = 0.0) -> tuple:
+    """
+    문장별 MP3를 다시 인코딩하지 않고 하나의 트랙으로 이어붙입니다.
+    gap이나 gap_scale을 주면 각 문장 뒤에 따라 말할 시간만큼의 무음 프레임을 넣습니다 (섀도잉).
+
+    Args:
+        clips: 문장별 MP3 데이터 목록
+        texts: 문장 목록 (clips와 같은 순서)
+        gap: 문장 뒤에 넣을 무음 길이(초)
+        gap_scale: 문장 길이에 비례해 더할 무음 비율 (1.0이면 문장 길이만큼 더함)
+
+    Returns:
+        tuple: (트랙 MP3 bytes, 큐 시트 list)
+            큐 시트 항목: {'index': 덱 내 순번, 'start': 시작 초, 'end': 끝 초, 'text': 문장}
+            무음 구간은 큐의 끝과 다음 큐의 시작 사이에 들어갑니다.
+    """
+    if gap <= 0 and gap_scale <= 0:
+        track, spans = join_mp3(clips)
+    else:
+        parts = []
+        for clip in clips:
+            parts.append(clip)
+            parts.append(silence_like(clip, gap + gap_scale * mp3_duration_us(clip) / 1e6))
+        track, spans = join_mp3(parts)
+        spans = spans[::2]
+
+    cues = [
+        {'index': i, 'start': round(start, 3), 'end': round(end, 3), 'text': text}
+        for i, ((start, end), text) in enumerate(zip(spans, texts))
+    ]
+    return track, cues
+
+
+def _format_timestamp(seconds: float, separator: str) -> str:
+    """초를 HH:MM:SS<sep>mmm 형식으로 변환합니다."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def cues_to_srt(cues) -> str:
+    """큐 시트를 SRT 자막으로 변환합니다."""
+    blocks = []
+    for number, cue in enumerate(cues, start=1):
+        start = _format_timestamp(cue['start'], ',')
+        end = _format_timestamp(cue['end'], ',')
+        blocks.append(f"{number}\n{start} --> {end}\n{cue['text']}\n")
+    return '\n'.join(blocks)
+
+
+def cues_to_vtt(cues) -> str:
+    """큐 시트를 WebVTT 자막으로 변환합니다."""
+    blocks = ["WEBVTT\n"]
+    for cue in cues:
+        start = _format_timestamp(cue['start'], '.')
+        end = _format_timestamp(cue['end'], '.')
+        blocks.append(f"{start} --> {end}\n{cue['text']}\n")
+    return '\n'.join(blocks)
+
+
+# 00:01:02,500 / 00:01:02.500 / 01:02.500 (WebVTT는 시간 생략 가능)
+_CUE_TIME = r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})'
+_CUE_TIMING = re.compile(rf'^\s*{_CUE_TIME}\s*-->\s*{_CUE_TIME}')
+_CUE_TAG = re.compile(r'<[^>]+>')
+_HANGUL = re.compile(r'[\uac00-\ud7a3\u3131-\u318e]')
+
+
+def _cue_seconds(hours, minutes, seconds, millis) -> float:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, '0')) / 1000
+
+
+def parse_subtitles(text: str) -> list:
+    """
+    SRT 또는 WebVTT 자막을 큐 목록으로 변환합니다.
+    한 큐 안에서 한글이 들어간 줄은 번역(korean)으로, 나머지 줄은 문장(text)으로 나눕니다.
+
+    Args:
+        text: 자막 파일 내용
+
+    Returns:
+        list: [{'start': 시작 초, 'end': 끝 초, 'text': 문장, 'korean': 번역}, ...] 시작 시간 순
+    """
+    cues = []
+    for block in re.split(r'\n\s*\n', text.replace('\r\n', '\n').replace('\r', '\n')):
+        lines = block.strip('\n').split('\n')
+        for i, line in enumerate(lines):
+            timing = _CUE_TIMING.match(line)
+            if timing is None:
+                continue
+
+            groups = timing.groups()
+            english, korean = [], []
+            for body in lines[i + 1:]:
+                body = _CUE_TAG.sub('', body).strip()
+                if body:
+                    (korean if _HANGUL.search(body) else english).append(body)
+            if english:
+                cues.append({
+                    'start': _cue_seconds(*groups[:4]),
+                    'end': _cue_seconds(*groups[4:]),
+                    'text': ' '.join(english),
+                    'korean': '\n'.join(korean),
+                })
+            break
+
+    cues.sort(key=lambda cue: cue['start'])
+    return cues
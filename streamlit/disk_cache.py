@@ -0,0 +1,152 @@
+"""
+Size-bounded LRU disk cache for synthesized audio
+서버 재시작 후에도 유지되는 오디오 디스크 캐시
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+ENTRY_SUFFIX = '.entry'
+
+
+def make_cache_key(*parts) -> str:
+    """캐시 키 구성 요소들로부터 안정적인 SHA-256 키를 만듭니다."""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def content_etag(data: bytes) -> str:
+    """데이터 내용의 해시(ETag)를 반환합니다."""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def file_digest(file, chunk_size: int = 1 << 20) -> str:
+    """
+    파일 객체 전체를 chunk_size씩 읽으며 SHA-256 해시를 계산합니다.
+    처음부터 읽고 끝나면 다시 처음 위치로 되돌립니다.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    크기 제한이 있는 LRU 디스크 캐시.
+
+    각 항목은 하나의 파일에 저장됩니다: 첫 줄은 JSON 메타데이터(재생 시간 등),
+    나머지는 원본 바이트입니다. 데이터와 메타데이터가 항상 함께 교체되도록
+    임시 파일에 쓴 뒤 os.replace로 원자적으로 옮깁니다.
+    최근 사용 순서는 파일 mtime에 기록되므로 재시작 후에도 유지됩니다.
+    메타데이터에는 항상 내용 해시('etag')가 포함됩니다.
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # {key: size_bytes}, 오래된 항목이 앞쪽
+        self._total_bytes = 0
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def _load_index(self):
+        """디스크의 기존 항목을 mtime 순으로 읽어 LRU 인덱스를 복원합니다."""
+        entries = []
+        for path in self.root.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def get(self, key: str):
+        """
+        캐시 항목을 읽습니다.
+
+        Returns:
+            tuple: (데이터 bytes, 메타데이터 dict), 없으면 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                data = f.read()
+            os.utime(path)
+            if 'etag' not in meta:
+                meta['etag'] = content_etag(data)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self._forget(key)
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return data, meta
+
+    def put(self, key: str, data: bytes, meta: dict) -> dict:
+        """
+        항목을 원자적으로 저장하고, 용량을 넘으면 오래된 항목부터 제거합니다.
+
+        Returns:
+            dict: 'etag'가 추가된 저장된 메타데이터
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        meta = dict(meta, etag=content_etag(data))
+        header = json.dumps(meta, ensure_ascii=False).encode('utf-8') + b'\n'
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        size = len(header) + len(data)
+        with self._lock:
+            self._forget(key)
+            self._index[key] = size
+            self._total_bytes += size
+            self._evict()
+        return meta
+
+    def _forget(self, key: str):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
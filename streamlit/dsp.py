@@ -0,0 +1,271 @@
+"""
+Vectorized audio processing with NumPy
+NumPy 기반 오디오 처리 함수들 (디코딩/인코딩은 pydub 사용)
+"""
+
+from io import BytesIO
+
+import numpy as np
+from pydub import AudioSegment
+
+from mp3 import audio_frames
+
+
+# ============================================================
+# 디코딩 / 인코딩
+# ============================================================
+
+def decode_mp3(data: bytes) -> tuple:
+    """
+    MP3를 모노 float32 PCM으로 디코딩합니다.
+
+    Returns:
+        tuple: (샘플 np.ndarray [-1, 1], 샘플레이트)
+    """
+    audio = AudioSegment.from_file(BytesIO(data), format="mp3").set_channels(1)
+    scale = float(1 << (8 * audio.sample_width - 1))
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32) / scale
+    return samples, audio.frame_rate
+
+
+def encode_mp3(samples: np.ndarray, sample_rate: int, bitrate: int = 32000) -> bytes:
+    """
+    모노 float32 PCM을 MP3로 인코딩합니다.
+
+    Args:
+        samples: [-1, 1] 범위의 샘플
+        sample_rate: 샘플레이트
+        bitrate: 목표 비트레이트 (bps)
+
+    Returns:
+        bytes: MP3 데이터
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    audio = AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+    fp = BytesIO()
+    audio.export(fp, format="mp3", bitrate=f"{bitrate // 1000}k")
+    return fp.getvalue()
+
+
+def source_bitrate(data: bytes, default: int = 32000) -> int:
+    """원본 MP3 첫 오디오 프레임의 비트레이트를 반환합니다."""
+    frames = audio_frames(data)
+    return frames[0][1].bitrate if frames else default
+
+
+# ============================================================
+# 무음 제거 / 음량 정규화
+# ============================================================
+
+def frame_levels_db(samples: np.ndarray, sample_rate: int, frame_ms: float = 10.0) -> tuple:
+    """
+    짧은 프레임별 RMS 에너지를 dBFS로 계산합니다.
+
+    Returns:
+        tuple: (프레임별 dBFS np.ndarray, 프레임 길이(샘플))
+    """
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10)), frame
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold_db: float = -40.0,
+                 pad_ms: float = 60.0) -> np.ndarray:
+    """
+    에너지가 threshold_db 이하인 앞뒤 구간을 잘라냅니다.
+    발화가 잘리지 않도록 pad_ms만큼 여유를 남기고, 전부 무음이면 원본을 그대로 반환합니다.
+    """
+    levels, frame = frame_levels_db(samples, sample_rate)
+    active = np.flatnonzero(levels > threshold_db)
+    if len(active) == 0:
+        return samples
+
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, active[0] * frame - pad)
+    end = min(len(samples), (active[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def normalize_loudness(samples: np.ndarray, sample_rate: int, target_db: float = -20.0,
+                       threshold_db: float = -40.0, peak_db: float = -1.0) -> np.ndarray:
+    """
+    발화 구간(threshold_db 초과 프레임)의 평균 에너지가 target_db가 되도록 음량을 맞춥니다.
+    최대 진폭이 peak_db를 넘지 않도록 이득을 제한하고, 전부 무음이면 원본을 그대로 반환합니다.
+    """
+    levels, frame = frame_levels_db(samples, sample_rate)
+    active = levels > threshold_db
+    if not active.any():
+        return samples
+
+    frames = samples[:len(levels) * frame].reshape(len(levels), frame)[active]
+    current_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64)))
+    gain = 10 ** ((target_db - current_db) / 20)
+
+    peak = float(np.max(np.abs(samples))) * gain
+    ceiling = 10 ** (peak_db / 20)
+    if peak > ceiling:
+        gain *= ceiling / peak
+    return (samples * gain).astype(np.float32)
+
+
+def process_speech_mp3(data: bytes, threshold_db: float = -40.0, target_db: float = -20.0) -> tuple:
+    """
+    TTS 결과 MP3의 앞뒤 무음을 잘라내고 음량을 맞춰 같은 형식으로 다시 인코딩합니다.
+    처리한 샘플로 파형 요약도 함께 계산하므로 결과를 다시 디코딩할 필요가 없습니다.
+
+    Args:
+        data: 원본 MP3 데이터
+        threshold_db: 무음으로 볼 에너지 기준 (dBFS)
+        target_db: 발화 구간의 목표 음량 (dBFS)
+
+    Returns:
+        tuple: (처리된 MP3 데이터 bytes, waveform_peaks 결과 np.ndarray)
+    """
+    samples, sample_rate = decode_mp3(data)
+    samples = trim_silence(samples, sample_rate, threshold_db)
+    samples = normalize_loudness(samples, sample_rate, target_db, threshold_db)
+    return encode_mp3(samples, sample_rate, source_bitrate(data)), waveform_peaks(samples)
+
+
+# ============================================================
+# 파형 요약
+# ============================================================
+
+def waveform_peaks(samples: np.ndarray, buckets: int = 200) -> np.ndarray:
+    """
+    샘플을 buckets개 구간으로 나눠 구간별 최대 진폭을 int8(0-127)로 반환합니다.
+
+    Args:
+        samples: [-1, 1] 범위의 모노 샘플
+        buckets: 구간 수
+
+    Returns:
+        np.ndarray: 길이 buckets의 int8 배열
+    """
+    if len(samples) == 0:
+        return np.zeros(buckets, dtype=np.int8)
+
+    # 구간 시작 위치마다 한 번에 최댓값을 구함 (샘플이 구간 수보다 적으면 같은 샘플을 공유)
+    starts = np.minimum(np.linspace(0, len(samples), buckets, endpoint=False).astype(np.int64),
+                        len(samples) - 1)
+    peaks = np.maximum.reduceat(np.abs(samples), starts)
+    return np.round(np.clip(peaks, 0.0, 1.0) * 127).astype(np.int8)
+
+
+def mp3_peaks(data: bytes, buckets: int = 200) -> np.ndarray:
+    """MP3를 디코딩하여 waveform_peaks를 계산합니다."""
+    samples, _ = decode_mp3(data)
+    return waveform_peaks(samples, buckets)
+
+
+# ============================================================
+# 음성용 저비트레이트 변환
+# ============================================================
+
+# 형식 이름 -> (pydub/ffmpeg 컨테이너, 코덱, 비트레이트, 추가 인자, HTTP Content-Type, <source> type)
+TRANSCODE_PROFILES = {
+    'opus': ('ogg', 'libopus', '16k', ['-application', 'voip'], 'audio/ogg', 'audio/ogg; codecs=opus'),
+    'aac': ('mp4', 'aac', '24k', ['-profile:a', 'aac_low'], 'audio/mp4', 'audio/mp4; codecs=mp4a.40.2'),
+}
+
+
+def transcode(data: bytes, fmt: str) -> tuple:
+    """
+    MP3를 음성에 맞춘 저비트레이트 Opus 또는 AAC로 변환합니다.
+
+    Args:
+        data: 원본 MP3 데이터
+        fmt: 'opus' 또는 'aac'
+
+    Returns:
+        tuple: (변환된 오디오 bytes, HTTP Content-Type, <source> type 속성)
+    """
+    container, codec, bitrate, parameters, mime, source_type = TRANSCODE_PROFILES[fmt]
+    audio = AudioSegment.from_file(BytesIO(data), format="mp3").set_channels(1)
+    fp = BytesIO()
+    audio.export(fp, format=container, codec=codec, bitrate=bitrate, parameters=parameters)
+    return fp.getvalue(), mime, source_type
+
+
+# ============================================================
+# 시간 늘이기 (WSOLA)
+# ============================================================
+
+def time_stretch(samples: np.ndarray, rate: float, sample_rate: int,
+                 frame_ms: float = 40.0) -> np.ndarray:
+    """
+    WSOLA(Waveform Similarity Overlap-Add)로 음높이를 유지한 채 재생 속도를 바꿉니다.
+
+    각 출력 프레임마다 허용 범위 안의 모든 입력 위치 후보를 한 번의 행렬 곱으로
+    비교하여, 직전 프레임의 자연스러운 연속과 가장 비슷한 구간을 고릅니다.
+
+    Args:
+        samples: 모노 float32 샘플
+        rate: 재생 속도 (2.0이면 두 배 빠르게, 0.5면 두 배 느리게)
+        sample_rate: 샘플레이트
+        frame_ms: 분석 프레임 길이(밀리초)
+
+    Returns:
+        np.ndarray: 길이가 약 len(samples) / rate인 샘플
+    """
+    if rate == 1.0 or len(samples) == 0:
+        return samples.astype(np.float32, copy=True)
+
+    frame = max(64, int(sample_rate * frame_ms / 1000) & ~1)
+    synthesis_hop = frame // 2
+    analysis_hop = synthesis_hop * rate
+    tolerance = frame // 4
+    window = np.hanning(frame).astype(np.float32)
+
+    output_length = int(len(samples) / rate)
+    frame_count = output_length // synthesis_hop + 1
+
+    # 탐색 범위가 배열 밖으로 나가지 않도록 앞뒤를 0으로 채움
+    pad = tolerance + frame + int(analysis_hop) + 1
+    padded = np.concatenate([
+        np.zeros(pad, dtype=np.float32),
+        samples.astype(np.float32),
+        np.zeros(pad + frame, dtype=np.float32),
+    ])
+    candidates_view = np.lib.stride_tricks.sliding_window_view(padded, frame)
+
+    output = np.zeros(frame_count * synthesis_hop + frame, dtype=np.float32)
+    norm = np.zeros_like(output)
+
+    previous = pad  # 직전에 선택한 입력 위치 (padded 기준)
+    for k in range(frame_count):
+        nominal = pad + int(round(k * analysis_hop))
+
+        if k == 0:
+            position = nominal
+        else:
+            # 직전 구간의 자연스러운 연속과 후보 구간들의 상관도를 한 번에 계산
+            template = padded[previous + synthesis_hop:previous + synthesis_hop + frame] * window
+            candidates = candidates_view[nominal - tolerance:nominal + tolerance + 1]
+            position = nominal - tolerance + int(np.argmax(candidates @ template))
+
+        start = k * synthesis_hop
+        output[start:start + frame] += padded[position:position + frame] * window
+        norm[start:start + frame] += window
+        previous = position
+
+    norm[norm < 1e-3] = 1.0
+    return (output / norm)[:output_length]
+
+
+def stretch_mp3(data: bytes, rate: float) -> bytes:
+    """
+    MP3를 음높이를 유지한 채 지정한 속도로 다시 렌더링합니다.
+
+    Args:
+        data: 원본 MP3 데이터
+        rate: 재생 속도
+
+    Returns:
+        bytes: 속도가 바뀐 MP3 데이터
+    """
+    samples, sample_rate = decode_mp3(data)
+    stretched = time_stretch(samples, rate, sample_rate)
+    return encode_mp3(stretched, sample_rate, source_bitrate(data))
@@ -0,0 +1,214 @@
+"""
+Background audio generation jobs
+스크립트 재실행과 무관하게 계속 실행되는 백그라운드 오디오 생성 작업
+"""
+
+import threading
+
+from config import TTS_LANG, TTS_MAX_WORKERS
+
+
+class GenerationJob:
+    """
+    덱 하나의 문장 오디오를 백그라운드 스레드에서 생성하는 작업.
+
+    결과 오디오는 디스크 캐시에만 저장되고, 작업은 문장별 준비 상태와
+    재생 시간만 보관합니다. Streamlit 세션 상태에는 접근하지 않으므로
+    여러 세션이 같은 작업을 공유할 수 있습니다.
+
+    Args:
+        texts: 생성할 문장 목록
+        keys: 문장별 디스크 캐시 키 (texts와 같은 순서)
+        backend: TTS 백엔드
+        disk_cache: 오디오 디스크 캐시
+        meta_fn: MP3 bytes를 받아 디스크 캐시 메타데이터 dict를 반환하는 함수
+                 ('duration' 필수, 파형 요약 등 한 번만 계산할 값을 함께 저장)
+        lang: 언어 코드
+        max_workers: 동시에 실행할 TTS 요청 수
+        langs: 문장별 언어 코드 목록 (texts와 같은 순서, 없으면 모두 lang)
+        on_cached: 새 오디오가 디스크 캐시에 저장된 뒤 호출되는 함수 (audio_bytes).
+                   변환본 생성 등 후처리에 사용하며, 실패해도 작업은 계속됩니다.
+    """
+
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, texts, keys, backend, disk_cache, meta_fn,
+                 lang: str = TTS_LANG, max_workers: int = TTS_MAX_WORKERS, langs=None, on_cached=None):
+        self.texts = list(texts)
+        self.keys = list(keys)
+        self.total = len(self.texts)
+        self.langs = list(langs) if langs is not None else [lang] * self.total
+
+        self._backend = backend
+        self._disk_cache = disk_cache
+        self._meta_fn = meta_fn
+        self._lang = lang
+        self._max_workers = max_workers
+        self._on_cached = on_cached
+
+        self._lock = threading.Condition()
+        self._status = [self.PENDING] * self.total
+        self._durations = {}  # {문장 순번: 재생 시간}
+        self._errors = {}  # {문장 순번: 오류 메시지}
+        self._completed = 0
+        self._done = False
+
+        self._thread = threading.Thread(target=self._run, name='audio-generation', daemon=True)
+
+    def start(self) -> 'GenerationJob':
+        """백그라운드 생성을 시작합니다."""
+        self._thread.start()
+        return self
+
+    # ------------------------------------------------------------
+    # 상태 조회 (모든 스레드에서 안전)
+    # ------------------------------------------------------------
+
+    @property
+    def done(self) -> bool:
+        with self._lock:
+            return self._done
+
+    @property
+    def completed(self) -> int:
+        """준비되었거나 실패한 문장 수"""
+        with self._lock:
+            return self._completed
+
+    def status(self, i: int) -> str:
+        """i번째 문장의 상태 ('pending', 'ready', 'failed')를 반환합니다."""
+        with self._lock:
+            return self._status[i]
+
+    def ready_items(self) -> dict:
+        """준비된 문장들의 {순번: 재생 시간}을 반환합니다."""
+        with self._lock:
+            return dict(self._durations)
+
+    def errors(self) -> dict:
+        """실패한 문장들의 {순번: 오류 메시지}를 반환합니다."""
+        with self._lock:
+            return dict(self._errors)
+
+    def wait(self, completed: int, timeout: float = None) -> int:
+        """
+        완료된 문장 수가 completed보다 커지거나 작업이 끝날 때까지 기다립니다.
+
+        Returns:
+            int: 현재 완료된 문장 수
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self._completed > completed or self._done, timeout)
+            return self._completed
+
+    # ------------------------------------------------------------
+    # 작업 스레드
+    # ------------------------------------------------------------
+
+    def _finish_item(self, i: int, status: str, duration: float = None, error: str = None):
+        with self._lock:
+            if self._status[i] != self.PENDING:
+                return
+            self._status[i] = status
+            if duration is not None:
+                self._durations[i] = duration
+            if error is not None:
+                self._errors[i] = error
+            self._completed += 1
+            self._lock.notify_all()
+
+    def _run(self):
+        try:
+            # 디스크 캐시 적중은 바로 준비 상태로 만들고, 나머지는 (텍스트, 언어)별로 모아서 합성
+            missing = {}  # {(text, lang): [문장 순번, ...]}
+            for i, (text, key) in enumerate(zip(self.texts, self.keys)):
+                entry = self._disk_cache.get(key)
+                if entry is not None:
+                    self._finish_item(i, self.READY, duration=entry[1]['duration'])
+                else:
+                    missing.setdefault((text, self.langs[i]), []).append(i)
+
+            items = list(missing)
+
+            def on_result(j, audio_bytes):
+                indices = missing[items[j]]
+                try:
+                    meta = self._meta_fn(audio_bytes)
+                    duration = meta['duration']
+                    self._disk_cache.put(self.keys[indices[0]], audio_bytes, meta)
+                except Exception as e:
+                    # 잘못된 클립 하나(디코딩 실패, 디스크 오류 등)가 나머지 문장 합성을 멈추지 않도록 해당 문장만 실패 처리
+                    on_error(j, e)
+                    return
+                for i in indices:
+                    self._finish_item(i, self.READY, duration=duration)
+
+                if self._on_cached is not None:
+                    try:
+                        self._on_cached(audio_bytes)
+                    except Exception:
+                        pass
+
+            def on_error(j, exc):
+                for i in missing[items[j]]:
+                    self._finish_item(i, self.FAILED, error=str(exc))
+
+            self._backend.synthesize_many(
+                [text for text, _ in items],
+                lang=self._lang,
+                max_workers=self._max_workers,
+                on_result=on_result,
+                on_error=on_error,
+                langs=[lang for _, lang in items],
+            )
+        finally:
+            with self._lock:
+                for i, status in enumerate(self._status):
+                    if status == self.PENDING:
+                        self._status[i] = self.FAILED
+                        self._errors.setdefault(i, "생성이 중단되었습니다.")
+                self._completed = self.total
+                self._done = True
+                self._lock.notify_all()
+
+
+class JobRegistry:
+    """
+    프로세스 전체에서 공유하는 생성 작업 목록.
+    같은 덱을 여러 세션이 불러와도 작업은 하나만 실행됩니다.
+
+    Args:
+        max_jobs: 보관할 최대 작업 수 (끝난 작업부터 제거)
+    """
+
+    def __init__(self, max_jobs: int = 32):
+        self.max_jobs = max_jobs
+        self._jobs = {}  # {작업 키: GenerationJob}, 삽입 순서 유지
+        self._lock = threading.Lock()
+
+    def get_or_start(self, key: str, factory) -> GenerationJob:
+        """
+        key에 해당하는 작업을 반환하고, 없거나 실패한 문장이 있는 끝난 작업이면 새로 시작합니다.
+
+        Args:
+            key: 작업 키 (덱 구성에 대한 해시)
+            factory: 새 GenerationJob을 만드는 인자 없는 함수
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done and job.errors()):
+                return job
+
+            job = factory().start()
+            self._jobs.pop(key, None)
+            self._jobs[key] = job
+
+            # 오래된 작업부터 제거 (실행 중인 작업은 유지)
+            for old_key in list(self._jobs):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                if self._jobs[old_key].done:
+                    del self._jobs[old_key]
+            return job
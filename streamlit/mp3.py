@@ -0,0 +1,392 @@
+"""
+MP3 frame-level helpers
+디코딩 없이 MP3 프레임을 직접 다루는 함수들
+"""
+
+from collections import namedtuple
+
+
+# ============================================================
+# 프레임 헤더 파싱
+# ============================================================
+
+# MPEG 버전 비트 -> 버전 (1, 2, 2.5)
+_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+
+# 레이어 비트 -> 레이어 번호
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+# (MPEG-1 여부, 레이어) -> 비트레이트 표 (kbps)
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+
+FrameHeader = namedtuple('FrameHeader', [
+    'version',            # 1, 2, 2.5
+    'layer',              # 1, 2, 3
+    'bitrate',            # bps
+    'sample_rate',        # Hz
+    'channels',           # 1 또는 2
+    'padding',            # 패딩 바이트 여부
+    'frame_length',       # 헤더 포함 프레임 길이 (바이트)
+    'samples_per_frame',  # 프레임당 샘플 수
+])
+
+
+def parse_frame_header(data: bytes, offset: int = 0):
+    """
+    offset 위치의 4바이트 MP3 프레임 헤더를 해석합니다.
+
+    Returns:
+        FrameHeader: 올바른 헤더가 아니면 None
+    """
+    if offset + 4 > len(data):
+        return None
+
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = _VERSIONS.get((b1 >> 3) & 0b11)
+    layer = _LAYERS.get((b1 >> 1) & 0b11)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    is_mpeg1 = version == 1
+    bitrate = _BITRATES[(is_mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0b1
+    channels = 1 if (b3 >> 6) == 0b11 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or is_mpeg1:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+
+    return FrameHeader(version, layer, bitrate, sample_rate, channels, padding,
+                       frame_length, samples_per_frame)
+
+
+def _side_info_length(header: FrameHeader) -> int:
+    """Layer III 사이드 정보 길이(바이트)를 반환합니다."""
+    if header.version == 1:
+        return 17 if header.channels == 1 else 32
+    return 9 if header.channels == 1 else 17
+
+
+def _skip_id3v2(data: bytes) -> int:
+    """앞쪽의 ID3v2 태그를 건너뛴 오프셋을 반환합니다."""
+    offset = 0
+    while data[offset:offset + 3] == b'ID3' and offset + 10 <= len(data):
+        flags = data[offset + 5]
+        size = 0
+        for byte in data[offset + 6:offset + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        offset += 10 + size + (10 if flags & 0x10 else 0)
+    return offset
+
+
+def _find_first_frame(data: bytes, offset: int):
+    """
+    offset 이후 첫 번째 프레임을 찾습니다.
+    우연히 동기 비트와 일치하는 데이터를 피하기 위해 다음 프레임까지 확인합니다.
+
+    Returns:
+        tuple: (오프셋, FrameHeader), 없으면 (-1, None)
+    """
+    while True:
+        offset = data.find(b'\xFF', offset)
+        if offset < 0:
+            return -1, None
+
+        header = parse_frame_header(data, offset)
+        if header is not None:
+            next_offset = offset + header.frame_length
+            if next_offset >= len(data) or parse_frame_header(data, next_offset) is not None:
+                return offset, header
+        offset += 1
+
+
+def iter_frames(data: bytes):
+    """
+    MP3 데이터의 오디오 프레임을 순서대로 반환합니다.
+    ID3 태그는 건너뛰고, 프레임이 끊긴 곳에서는 다음 동기 지점을 다시 찾습니다.
+
+    Yields:
+        tuple: (오프셋, FrameHeader)
+    """
+    offset, header = _find_first_frame(data, _skip_id3v2(data))
+    while header is not None:
+        if offset + header.frame_length > len(data):
+            return
+        yield offset, header
+
+        offset += header.frame_length
+        header = parse_frame_header(data, offset)
+        if header is None:
+            offset, header = _find_first_frame(data, offset)
+
+
+# ============================================================
+# Xing / Info / VBRI 헤더
+# ============================================================
+
+def _read_uint32(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset:offset + 4], 'big')
+
+
+def _parse_xing(data: bytes, offset: int, header: FrameHeader):
+    """
+    첫 프레임의 Xing/Info 헤더를 읽습니다.
+
+    Returns:
+        tuple: (총 프레임 수 또는 None, 인코더 지연 샘플, 끝 패딩 샘플), 헤더가 없으면 None
+    """
+    pos = offset + 4 + _side_info_length(header)
+    if data[pos:pos + 4] not in (b'Xing', b'Info'):
+        return None
+
+    flags = _read_uint32(data, pos + 4)
+    pos += 8
+    frames = None
+    if flags & 0x1:
+        frames = _read_uint32(data, pos)
+        pos += 4
+    if flags & 0x2:
+        pos += 4
+    if flags & 0x4:
+        pos += 100
+    if flags & 0x8:
+        pos += 4
+
+    # LAME 확장 태그: 인코더 지연/패딩 (각 12비트)
+    delay = padding = 0
+    if data[pos:pos + 4] in (b'LAME', b'Lavf', b'Lavc'):
+        gapless = data[pos + 21:pos + 24]
+        if len(gapless) == 3:
+            delay = (gapless[0] << 4) | (gapless[1] >> 4)
+            padding = ((gapless[1] & 0x0F) << 8) | gapless[2]
+
+    return frames, delay, padding
+
+
+def _parse_vbri(data: bytes, offset: int):
+    """첫 프레임의 VBRI 헤더에서 총 프레임 수를 읽습니다 (없으면 None)."""
+    pos = offset + 4 + 32
+    if data[pos:pos + 4] != b'VBRI':
+        return None
+    return _read_uint32(data, pos + 14)
+
+
+def _parse_info_frame(data: bytes, offset: int, header: FrameHeader):
+    """
+    첫 프레임이 메타데이터(Xing/Info/VBRI) 프레임인지 확인합니다.
+
+    Returns:
+        tuple: (총 프레임 수 또는 None, 지연 샘플, 패딩 샘플), 오디오 프레임이면 None
+    """
+    if header.layer != 3:
+        return None
+
+    xing = _parse_xing(data, offset, header)
+    if xing is not None:
+        return xing
+
+    frames = _parse_vbri(data, offset)
+    if frames is not None:
+        return frames, 0, 0
+    return None
+
+
+# ============================================================
+# 재생 시간
+# ============================================================
+
+def mp3_duration_us(data: bytes) -> int:
+    """
+    MP3를 디코딩하지 않고 재생 시간을 마이크로초 단위로 계산합니다.
+
+    Xing/Info/VBRI 헤더에 총 프레임 수가 있으면 그것을 사용하고,
+    없으면(CBR 등) 모든 프레임 헤더를 훑어 샘플 수를 더합니다.
+
+    Args:
+        data: MP3 데이터
+
+    Returns:
+        int: 재생 시간(마이크로초)
+
+    Raises:
+        ValueError: MP3 프레임을 찾을 수 없는 경우
+    """
+    frames = iter_frames(data)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("MP3 프레임을 찾을 수 없습니다.")
+
+    offset, header = first
+    info = _parse_info_frame(data, offset, header)
+
+    if info is not None and info[0]:
+        frame_count, delay, padding = info
+        samples = frame_count * header.samples_per_frame - delay - padding
+        return max(0, samples) * 1_000_000 // header.sample_rate
+
+    # 프레임마다 샘플레이트가 같다고 가정하지 않고 프레임 단위로 누적
+    total_us = 0
+    if info is None:
+        total_us += header.samples_per_frame * 1_000_000 / header.sample_rate
+    for _, header in frames:
+        total_us += header.samples_per_frame * 1_000_000 / header.sample_rate
+    return int(total_us)
+
+
+# ============================================================
+# 프레임 단위 이어붙이기
+# ============================================================
+
+def audio_frames(data: bytes) -> list:
+    """
+    메타데이터(Xing/Info/VBRI) 프레임을 제외한 오디오 프레임 목록을 반환합니다.
+
+    Returns:
+        list: [(오프셋, FrameHeader), ...]
+    """
+    frames = list(iter_frames(data))
+    if frames and _parse_info_frame(data, *frames[0]) is not None:
+        frames = frames[1:]
+    return frames
+
+
+def join_mp3(clips) -> tuple:
+    """
+    여러 MP3를 다시 인코딩하지 않고 프레임 단위로 이어붙입니다.
+    ID3 태그와 Xing/Info 프레임은 제거되며, 모든 클립의 샘플레이트와 채널 수가 같아야 합니다.
+
+    Args:
+        clips: MP3 데이터 목록
+
+    Returns:
+        tuple: (이어붙인 MP3 bytes, 클립별 (시작 초, 끝 초) 목록)
+
+    Raises:
+        ValueError: 형식이 다른 클립이 섞여 있는 경우
+    """
+    parts = []
+    spans = []
+    fmt = None
+    samples = 0
+    sample_rate = None
+
+    for clip in clips:
+        start = samples
+        for offset, header in audio_frames(clip):
+            if fmt is None:
+                fmt = (header.sample_rate, header.channels)
+                sample_rate = header.sample_rate
+            elif (header.sample_rate, header.channels) != fmt:
+                raise ValueError("샘플레이트나 채널 수가 다른 MP3는 이어붙일 수 없습니다.")
+
+            parts.append(clip[offset:offset + header.frame_length])
+            samples += header.samples_per_frame
+
+        spans.append((start, samples))
+
+    rate = sample_rate or 1
+    return b''.join(parts), [(start / rate, end / rate) for start, end in spans]
+
+
+# ============================================================
+# 무음 프레임
+# ============================================================
+
+# gTTS가 반환하는 형식과 같은 MPEG-2 Layer III, 24kHz, 32kbps, 모노
+SILENT_SAMPLE_RATE = 24000
+SILENT_BITRATE = 32000
+SILENT_SAMPLES_PER_FRAME = 576
+
+# 헤더: 동기 비트 + MPEG-2 + Layer III + CRC 없음 / 32kbps, 24kHz / 모노
+_SILENT_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+_SILENT_FRAME_BYTES = 72 * SILENT_BITRATE // SILENT_SAMPLE_RATE
+
+
+def silent_frame(template: bytes = None) -> bytes:
+    """
+    무음 MP3 프레임 하나를 만듭니다.
+    사이드 정보가 모두 0이면 part2_3_length가 0이므로 모든 계수가 0(무음)으로 디코딩됩니다.
+
+    Args:
+        template: 형식을 맞출 Layer III 프레임 헤더 4바이트.
+                  주어지면 같은 버전/샘플레이트/비트레이트/채널의 프레임을 만들어
+                  원본 클립 사이에 다시 인코딩 없이 끼워 넣을 수 있습니다.
+
+    Raises:
+        ValueError: template이 Layer III 프레임 헤더가 아닌 경우
+    """
+    if template is None:
+        return _SILENT_HEADER + bytes(_SILENT_FRAME_BYTES - len(_SILENT_HEADER))
+
+    # CRC와 패딩 비트를 끈 같은 형식의 헤더
+    header_bytes = bytes([template[0], template[1] | 0x01, template[2] & ~0x02, template[3]])
+    header = parse_frame_header(header_bytes)
+    if header is None or header.layer != 3:
+        raise ValueError("무음 프레임은 Layer III 헤더로만 만들 수 있습니다.")
+    return header_bytes + bytes(header.frame_length - len(header_bytes))
+
+
+def silent_mp3(duration: float, template: bytes = None) -> bytes:
+    """
+    지정한 길이(초)의 무음 MP3를 만듭니다.
+
+    Args:
+        duration: 재생 시간(초)
+        template: 형식을 맞출 프레임 헤더 4바이트 (silent_frame 참고)
+
+    Returns:
+        bytes: 무음 MP3 데이터 (최소 1프레임)
+    """
+    if template is None:
+        sample_rate, samples_per_frame = SILENT_SAMPLE_RATE, SILENT_SAMPLES_PER_FRAME
+    else:
+        header = parse_frame_header(template)
+        if header is None:
+            raise ValueError("올바른 MP3 프레임 헤더가 아닙니다.")
+        sample_rate, samples_per_frame = header.sample_rate, header.samples_per_frame
+
+    frame_count = max(1, round(duration * sample_rate / samples_per_frame))
+    return silent_frame(template) * frame_count
+
+
+def silence_like(data: bytes, duration: float) -> bytes:
+    """
+    주어진 MP3와 같은 형식의 무음 MP3를 만듭니다. join_mp3로 원본 사이에 끼워 넣을 때 사용합니다.
+
+    Args:
+        data: 형식을 맞출 MP3 데이터
+        duration: 재생 시간(초)
+
+    Returns:
+        bytes: 무음 MP3 데이터, duration이 0 이하이면 빈 bytes
+    """
+    if duration <= 0:
+        return b''
+    frames = audio_frames(data)
+    template = data[frames[0][0]:frames[0][0] + 4] if frames else None
+    return silent_mp3(duration, template)
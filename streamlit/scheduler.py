@@ -0,0 +1,297 @@
+"""
+Rate-limit-aware TTS request scheduling
+TTS 제공자의 요청 제한을 고려한 요청 스케줄링 (토큰 버킷 / 재시도 / 서킷 브레이커)
+"""
+
+import random
+import threading
+import time
+
+from config import (
+    TTS_RATE_PER_MIN,
+    TTS_RATE_BURST,
+    TTS_MAX_RETRIES,
+    TTS_BACKOFF_BASE_MS,
+    TTS_BACKOFF_MAX_MS,
+    TTS_BREAKER_THRESHOLD,
+    TTS_BREAKER_COOLDOWN_MS,
+    TTS_BREAKER_MAX_PROBES,
+)
+
+
+class RateLimitError(Exception):
+    """TTS 제공자가 요청 제한(HTTP 429 등)으로 요청을 거절했을 때 발생하는 예외"""
+
+
+class SchedulerTimeout(Exception):
+    """요청 제한이나 제공자 장애 때문에 제한 시간 안에 요청을 보낼 수 없을 때 발생하는 예외"""
+
+
+def _check_deadline(deadline, wait: float):
+    """wait초를 기다리면 deadline(time.monotonic 기준)을 넘는 경우 SchedulerTimeout을 발생시킵니다."""
+    if deadline is not None and time.monotonic() + wait > deadline:
+        raise SchedulerTimeout("TTS 요청 제한으로 지금은 오디오를 만들 수 없습니다. 잠시 후 다시 시도해주세요.")
+
+
+# 다시 시도해도 결과가 같은 입력 오류
+_PERMANENT_ERRORS = (ValueError, TypeError, AssertionError, NotImplementedError)
+
+
+class TokenBucket:
+    """
+    요청 속도를 제한하는 적응형 토큰 버킷.
+
+    요청 제한을 만나면 속도를 절반으로 줄이고, 성공할 때마다 설정한 최대 속도까지
+    조금씩 되돌려(AIMD) 제공자가 허용하는 최대 처리량 근처를 유지합니다.
+
+    Args:
+        rate: 초당 최대 요청 수
+        burst: 한 번에 몰아서 보낼 수 있는 최대 요청 수
+        min_rate: 속도를 줄여도 유지할 최소 초당 요청 수
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.2):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            return self._rate
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, deadline: float = None):
+        """
+        토큰 하나를 얻을 때까지 기다립니다.
+
+        Raises:
+            SchedulerTimeout: deadline 전에 토큰을 얻을 수 없는 경우
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate
+            _check_deadline(deadline, wait)
+            time.sleep(wait)
+
+    def on_success(self):
+        """성공한 요청마다 속도를 조금씩 최대 속도 쪽으로 되돌립니다."""
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.max_rate / 20)
+
+    def on_throttled(self):
+        """요청 제한을 만나면 속도를 절반으로 줄이고 남은 토큰을 비웁니다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = max(self.min_rate, self._rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 쌓이면 요청을 잠시 멈추는 서킷 브레이커.
+
+    열린 동안에는 요청을 실패시키는 대신 대기열을 멈춰 두고, 대기 시간이 지나면
+    요청 하나만 시험 삼아 보냅니다. 시험 요청이 성공하면 닫히고, 실패하면
+    대기 시간을 두 배로 늘려 다시 엽니다.
+
+    Args:
+        threshold: 브레이커를 여는 연속 실패 수
+        cooldown: 처음 열렸을 때 기다리는 시간(초)
+        max_cooldown: 최대 대기 시간(초)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold: int, cooldown: float, max_cooldown: float = 300.0):
+        self.threshold = max(1, threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+
+        self._lock = threading.Condition()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._cooldown = cooldown
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def remaining(self) -> float:
+        """다시 요청을 보낼 수 있을 때까지 남은 시간(초), 열려 있지 않으면 0"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._cooldown - time.monotonic())
+
+    def acquire(self, deadline: float = None):
+        """
+        요청을 보내도 될 때까지 기다립니다. 열려 있으면 대기 시간이 끝날 때까지 멈춥니다.
+
+        Raises:
+            SchedulerTimeout: deadline 전에 브레이커가 닫히지 않는 경우 (기다리지 않고 바로 발생)
+        """
+        with self._lock:
+            while True:
+                if self._state == self.CLOSED:
+                    return
+                if self._state == self.OPEN:
+                    wait = self._opened_at + self._cooldown - time.monotonic()
+                    if wait <= 0:
+                        # 시험 요청은 이 스레드 하나만 보냄
+                        self._state = self.HALF_OPEN
+                        return
+                    _check_deadline(deadline, wait)
+                    self._lock.wait(wait)
+                else:
+                    # 다른 스레드의 시험 요청 결과를 기다림
+                    # (결과가 오지 않는 경우에도 상태를 다시 확인하도록 대기 시간 단위로 깨어남)
+                    wait = self._cooldown
+                    if deadline is not None:
+                        _check_deadline(deadline, 0.0)
+                        wait = min(wait, deadline - time.monotonic())
+                    self._lock.wait(wait)
+
+    def release(self):
+        """
+        acquire로 얻은 시험 요청 기회를 보내지 않고 돌려줍니다.
+        대기 시간은 이미 지났으므로 기다리던 다른 요청이 바로 시험 요청을 보냅니다.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+                self._lock.notify_all()
+
+    def on_success(self):
+        with self._lock:
+            self._failures = 0
+            self._cooldown = self.base_cooldown
+            self._state = self.CLOSED
+            self._lock.notify_all()
+
+    def on_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+                self._open()
+            elif self._state == self.CLOSED and self._failures >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._lock.notify_all()
+
+
+class RequestScheduler:
+    """
+    TTS 요청 하나를 토큰 버킷, 서킷 브레이커, 지수 백오프 재시도로 감싸 실행합니다.
+    프로세스 전체에서 하나를 공유해야 모든 세션과 작업의 요청 속도가 함께 제한됩니다.
+
+    Args:
+        bucket: 요청 속도 제한
+        breaker: 연속 실패 시 대기열을 멈추는 브레이커
+        max_retries: 요청별 최대 재시도 횟수
+        backoff_base: 첫 재시도 전 기본 대기 시간(초)
+        backoff_max: 재시도 대기 시간 상한(초)
+        max_probes: 브레이커가 열린 동안 요청별로 허용하는 실패 수
+    """
+
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker,
+                 max_retries: int = TTS_MAX_RETRIES,
+                 backoff_base: float = TTS_BACKOFF_BASE_MS / 1000.0,
+                 backoff_max: float = TTS_BACKOFF_MAX_MS / 1000.0,
+                 max_probes: int = TTS_BREAKER_MAX_PROBES):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_probes = max_probes
+
+    @property
+    def paused(self) -> bool:
+        """서킷 브레이커가 열려 요청이 멈춰 있는지 여부"""
+        return self.breaker.state != CircuitBreaker.CLOSED
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째 재시도 전 대기 시간 (full jitter 지수 백오프)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn, *args, deadline: float = None):
+        """
+        fn(*args)를 실행하고, 일시적인 오류는 백오프 후 다시 시도합니다.
+
+        Args:
+            fn: 요청 함수
+            deadline: 이 시각(time.monotonic 기준)까지 끝내지 못하면 포기합니다.
+                      화면이 기다리는 요청에 쓰며, 브레이커가 열려 있으면 기다리지 않고 바로 실패합니다.
+                      없으면 백그라운드 작업처럼 브레이커가 닫힐 때까지 기다립니다.
+
+        Raises:
+            SchedulerTimeout: deadline 안에 요청을 보낼 수 없는 경우
+            Exception: 입력 오류이거나, 재시도 횟수나 브레이커 시험 요청 실패 수를 모두 쓴 경우 마지막 예외
+        """
+        attempt = 0
+        probes = 0
+        while True:
+            self.breaker.acquire(deadline)
+            try:
+                self.bucket.acquire(deadline)
+            except SchedulerTimeout:
+                # 시험 요청 기회를 쥔 채 포기하면 브레이커가 반쯤 열린 상태로 남으므로 돌려줌
+                self.breaker.release()
+                raise
+            try:
+                result = fn(*args)
+            except _PERMANENT_ERRORS:
+                # 입력 문제는 제공자 상태와 무관하므로 브레이커에 반영하지 않음
+                self.breaker.on_success()
+                raise
+            except Exception as e:
+                if isinstance(e, RateLimitError):
+                    self.bucket.on_throttled()
+                self.breaker.on_failure()
+                if self.breaker.state == CircuitBreaker.OPEN:
+                    # 제공자가 막힌 동안에는 재시도 횟수 대신 시험 요청 실패 수를 세고,
+                    # 백오프 대신 브레이커가 닫힐 때까지 멈춤 (장애가 계속되면 결국 실패 처리)
+                    probes += 1
+                    if probes > self.max_probes:
+                        raise
+                    continue
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                backoff = self.backoff(attempt)
+                _check_deadline(deadline, backoff)
+                time.sleep(backoff)
+                continue
+            self.bucket.on_success()
+            self.breaker.on_success()
+            return result
+
+
+def create_scheduler() -> RequestScheduler:
+    """설정값으로 요청 스케줄러를 생성합니다."""
+    return RequestScheduler(
+        TokenBucket(TTS_RATE_PER_MIN / 60.0, TTS_RATE_BURST),
+        CircuitBreaker(TTS_BREAKER_THRESHOLD, TTS_BREAKER_COOLDOWN_MS / 1000.0),
+    )
@@ -0,0 +1,95 @@
+"""
+Inverted word index over deck sentences
+덱 문장(영어/한국어)의 단어 역색인 검색
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+
+# 영어 단어(축약형 포함), 숫자, 한글 어절
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[가-힣]+")
+
+
+def tokenize(text: str) -> list:
+    """문장을 소문자 단어 목록으로 나눕니다."""
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SentenceIndex:
+    """
+    단어 → 행 순번 역색인.
+
+    단어 목록을 정렬해 두고 단어마다 행 순번을 정렬된 int32 배열로 보관하므로,
+    검색은 이진 탐색과 배열 교집합만으로 끝나 덱 크기와 거의 무관하게 빠릅니다.
+    한국어는 조사가 붙은 어절로 색인되므로 마지막 검색어는 접두사로 찾습니다 ('가난' → '가난은').
+
+    Args:
+        english: 행별 영어 문장
+        korean: 행별 한국어 번역
+    """
+
+    def __init__(self, english, korean):
+        postings = {}
+        size = 0
+        for i, (en, ko) in enumerate(zip(english, korean)):
+            for token in set(tokenize(en)) | set(tokenize(ko)):
+                postings.setdefault(token, []).append(i)
+            size = i + 1
+
+        # 모든 단어의 행 순번을 단어 순서대로 이어 붙여, 접두사 범위가 하나의 연속 구간이 되도록 함
+        self.size = size
+        self.vocabulary = sorted(postings)
+        lengths = np.fromiter((len(postings[token]) for token in self.vocabulary), dtype=np.int64,
+                              count=len(self.vocabulary))
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self._rows = np.fromiter((i for token in self.vocabulary for i in postings[token]), dtype=np.int32,
+                                 count=int(self._offsets[-1]))
+
+    def _range_rows(self, start: int, end: int) -> np.ndarray:
+        """vocabulary[start:end] 단어들이 들어간 행 순번 (오름차순, 중복 없음)"""
+        rows = self._rows[self._offsets[start]:self._offsets[end]]
+        if end - start <= 1:
+            return rows
+        # 여러 단어의 행을 합칠 때는 정렬 대신 행 수 크기의 표시 배열 사용
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def word_rows(self, word: str) -> np.ndarray:
+        """word와 정확히 같은 단어가 들어간 행 순번을 반환합니다."""
+        i = bisect_left(self.vocabulary, word)
+        if i < len(self.vocabulary) and self.vocabulary[i] == word:
+            return self._range_rows(i, i + 1)
+        return self._range_rows(0, 0)
+
+    def prefix_rows(self, prefix: str) -> np.ndarray:
+        """prefix로 시작하는 단어가 들어간 행 순번을 반환합니다."""
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\uffff', start)
+        return self._range_rows(start, end)
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        검색어의 모든 단어가 들어간 행 순번을 찾습니다.
+        마지막 단어는 입력 중일 수 있으므로 접두사로 찾습니다.
+
+        Returns:
+            np.ndarray: 오름차순 행 순번 (검색어에 단어가 없으면 빈 배열)
+        """
+        terms = tokenize(query)
+        if not terms:
+            return np.empty(0, dtype=np.int32)
+
+        # 가장 작은 결과를 기준으로, 나머지 정렬된 배열에서 이진 탐색으로 교집합을 구함
+        candidates = [self.word_rows(term) for term in terms[:-1]] + [self.prefix_rows(terms[-1])]
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if len(rows) == 0:
+                break
+            positions = np.minimum(np.searchsorted(other, rows), len(other) - 1)
+            rows = rows[other[positions] == rows]
+        return rows
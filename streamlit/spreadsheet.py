@@ -0,0 +1,113 @@
+"""
+Streaming spreadsheet readers
+통합 문서 전체를 메모리에 올리지 않고 첫 번째 시트를 한 행씩 읽는 함수들 (XLSX / ODS)
+"""
+
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+
+def _cell_text(value) -> str:
+    """셀 값을 문자열로 변환합니다 (빈 셀은 빈 문자열)."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_rows(file):
+    """
+    XLSX 첫 번째 시트의 행을 openpyxl 읽기 전용 모드로 하나씩 읽습니다.
+    읽기 전용 모드는 시트 XML을 스트리밍하므로 큰 통합 문서도 메모리 사용량이 일정합니다.
+
+    Args:
+        file: XLSX 파일 객체 또는 경로
+
+    Yields:
+        tuple: 셀 문자열 튜플
+
+    Raises:
+        ValueError: openpyxl이 설치되어 있지 않은 경우
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX 파일을 읽으려면 openpyxl이 필요합니다. (pip install openpyxl)")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield tuple(_cell_text(value) for value in row)
+    finally:
+        workbook.close()
+
+
+# OpenDocument 네임스페이스
+_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+# 빈 행/열 반복 수가 시트 끝까지 이어지는 경우를 막기 위한 상한
+_MAX_REPEAT = 1024
+
+
+def _paragraph_text(element) -> str:
+    """text:p 요소의 텍스트를 공백/줄바꿈 요소까지 포함해 합칩니다."""
+    parts = [element.text or '']
+    for child in element:
+        if child.tag == f'{_TEXT}s':
+            parts.append(' ' * int(child.get(f'{_TEXT}c', '1')))
+        elif child.tag == f'{_TEXT}line-break':
+            parts.append('\n')
+        elif child.tag == f'{_TEXT}tab':
+            parts.append('\t')
+        else:
+            # text:span 등 서식 요소
+            parts.append(_paragraph_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def iter_ods_rows(file):
+    """
+    ODS 첫 번째 시트의 행을 content.xml을 iterparse로 스트리밍하며 하나씩 읽습니다.
+    처리한 행은 바로 버리므로 메모리 사용량이 시트 크기와 무관합니다.
+
+    Args:
+        file: ODS 파일 객체 또는 경로
+
+    Yields:
+        tuple: 셀 문자열 튜플 (끝의 빈 셀 제외)
+    """
+    with zipfile.ZipFile(file) as archive, archive.open('content.xml') as content:
+        in_table = False
+        for event, element in iterparse(content, events=('start', 'end')):
+            if element.tag == f'{_TABLE}table':
+                if event == 'end':
+                    # 첫 번째 시트만 읽음
+                    return
+                in_table = True
+                continue
+
+            if event != 'end' or element.tag != f'{_TABLE}table-row' or not in_table:
+                continue
+
+            cells = []
+            for cell in element:
+                if cell.tag not in (f'{_TABLE}table-cell', f'{_TABLE}covered-table-cell'):
+                    continue
+                text = '\n'.join(_paragraph_text(p) for p in cell.iter(f'{_TEXT}p'))
+                repeat = min(int(cell.get(f'{_TABLE}number-columns-repeated', '1')), _MAX_REPEAT)
+                cells.extend([text] * repeat)
+
+            while cells and cells[-1] == '':
+                cells.pop()
+
+            row = tuple(cells)
+            repeat = int(element.get(f'{_TABLE}number-rows-repeated', '1'))
+            element.clear()
+            if not row:
+                # 시트 끝의 빈 행 반복은 건너뜀
+                continue
+            for _ in range(min(repeat, _MAX_REPEAT)):
+                yield row
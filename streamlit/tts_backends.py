@@ -0,0 +1,288 @@
+"""
+Pluggable text-to-speech backends
+교체 가능한 TTS 백엔드 (gTTS / 오프라인 로컬 / 지연 주입 가짜)
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from config import (
+    TTS_BACKEND,
+    TTS_MAX_WORKERS,
+    TTS_CHUNK_WORKERS,
+    TTS_LANG,
+    TTS_VOICE,
+    FAKE_TTS_LATENCY_MS,
+    FAKE_TTS_JITTER_MS,
+    FAKE_TTS_ERROR_RATE,
+    AUDIO_POSTPROCESS_ENABLED,
+    AUDIO_SILENCE_THRESHOLD_DB,
+    AUDIO_TARGET_LOUDNESS_DB,
+)
+from dsp import process_speech_mp3
+from mp3 import join_mp3, silent_mp3
+from scheduler import RateLimitError, create_scheduler
+
+
+class SynthesizedAudio(bytes):
+    """
+    합성 중에 이미 계산한 파형 요약(peaks)을 함께 전달하는 MP3 데이터.
+    캐시 메타데이터를 만들 때 peaks가 있으면 오디오를 다시 디코딩하지 않습니다.
+    """
+
+    peaks = None
+
+
+class TTSBackend:
+    """
+    TTS 백엔드 기본 클래스.
+
+    하위 클래스는 synthesize()만 구현하면 되고, synthesize_many()는
+    스레드 풀로 여러 문장을 동시에 합성합니다.
+    원격 요청은 _request()로 감싸 보내면 scheduler가 있을 때 요청 속도 제한,
+    일시적 오류 재시도, 연속 실패 시 대기가 요청 하나 단위로 적용됩니다.
+    """
+
+    # 캐시 키에 포함되어 백엔드별 결과가 섞이지 않도록 합니다
+    name = 'base'
+
+    # 원격 요청에 적용할 RequestScheduler (없으면 바로 요청)
+    scheduler = None
+
+    @property
+    def voice(self) -> str:
+        """캐시 키에 쓰이는 음성 식별자를 반환합니다."""
+        return self.name
+
+    @property
+    def paused(self) -> bool:
+        """요청 제한으로 잠시 멈춰 있는지 여부"""
+        return self.scheduler is not None and self.scheduler.paused
+
+    def _request(self, fn, *args, deadline: float = None):
+        """원격 요청 하나(fn(*args))를 scheduler를 거쳐 실행합니다."""
+        if self.scheduler is None:
+            return fn(*args)
+        return self.scheduler.call(fn, *args, deadline=deadline)
+
+    def synthesize(self, text: str, lang: str = TTS_LANG, deadline: float = None) -> bytes:
+        """
+        문장 하나를 MP3로 합성합니다.
+
+        Args:
+            text: 변환할 텍스트
+            lang: 언어 코드
+            deadline: 요청을 포기할 시각 (time.monotonic 기준, 없으면 끝날 때까지 기다림)
+
+        Returns:
+            bytes: MP3 오디오 데이터
+        """
+        raise NotImplementedError
+
+    def synthesize_many(self, texts, lang: str = TTS_LANG, max_workers: int = TTS_MAX_WORKERS,
+                        on_result=None, on_error=None, langs=None) -> list:
+        """
+        여러 문장을 동시에 합성합니다.
+
+        Args:
+            texts: 변환할 텍스트 목록
+            lang: 언어 코드
+            max_workers: 동시에 실행할 합성 요청 수 (1이면 순차 합성)
+            on_result: 결과가 나올 때마다 호출자 스레드에서 실행되는 콜백 (index, audio_bytes)
+            on_error: 합성에 실패한 문장마다 호출되는 콜백 (index, exception).
+                      없으면 첫 번째 실패에서 예외가 그대로 발생합니다.
+            langs: 문장별 언어 코드 목록 (texts와 같은 순서). 주어지면 lang 대신 사용합니다.
+
+        Returns:
+            list: texts와 같은 순서의 MP3 오디오 데이터 목록 (실패한 문장은 None)
+        """
+        texts = list(texts)
+        langs = list(langs) if langs is not None else [lang] * len(texts)
+        results = [None] * len(texts)
+        if not texts:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts)))) as executor:
+            futures = {
+                executor.submit(self.synthesize, text, text_lang): i
+                for i, (text, text_lang) in enumerate(zip(texts, langs))
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(i, e)
+                    continue
+                if on_result is not None:
+                    on_result(i, results[i])
+
+        return results
+
+
+class GTTSBackend(TTSBackend):
+    """
+    Google Translate TTS(gTTS) 백엔드.
+
+    gTTS는 긴 텍스트를 약 100자 토큰으로 나눠 write_to_fp() 안에서 하나씩 순서대로
+    요청합니다. 여기서는 먼저 토큰으로 나눈 뒤 토큰들을 동시에 요청하고
+    MP3 프레임 단위로 이어붙여, 긴 문장도 왕복 한 번에 가까운 시간에 합성합니다.
+    요청 제한과 재시도는 토큰 요청마다 적용되므로 한 토큰이 거절되어도 그 토큰만 다시 요청합니다.
+    """
+
+    name = 'gtts'
+
+    def __init__(self, tld: str = TTS_VOICE, chunk_workers: int = TTS_CHUNK_WORKERS):
+        self.tld = tld
+        self.chunk_workers = chunk_workers
+
+    @property
+    def voice(self) -> str:
+        return f"{self.name}:{self.tld}"
+
+    def _fetch(self, text: str, lang: str) -> bytes:
+        from gtts import gTTS, gTTSError
+
+        tts = gTTS(text=text, lang=lang, tld=self.tld, slow=False)
+        fp = BytesIO()
+        try:
+            tts.write_to_fp(fp)
+        except gTTSError as e:
+            if getattr(e.rsp, 'status_code', None) == 429:
+                raise RateLimitError(str(e)) from e
+            raise
+        return fp.getvalue()
+
+    def synthesize(self, text: str, lang: str = TTS_LANG, deadline: float = None) -> bytes:
+        from gtts import gTTS
+
+        chunks = gTTS(text=text, lang=lang, tld=self.tld, slow=False)._tokenize(text)
+        if len(chunks) <= 1 or self.chunk_workers <= 1:
+            return self._request(self._fetch, text, lang, deadline=deadline)
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(chunks))) as executor:
+            clips = list(executor.map(lambda chunk: self._request(self._fetch, chunk, lang, deadline=deadline),
+                                      chunks))
+        audio, _ = join_mp3(clips)
+        return audio
+
+
+class LocalBackend(TTSBackend):
+    """
+    네트워크 없이 동작하는 결정적 로컬 백엔드.
+    텍스트 길이에 비례하는 무음 MP3를 만들어 벤치마크와 오프라인 개발에 사용합니다.
+    """
+
+    name = 'local'
+
+    # 대략적인 발화 속도 (글자당 초)
+    SECONDS_PER_CHAR = 0.06
+    MIN_DURATION = 0.5
+
+    def synthesize(self, text: str, lang: str = TTS_LANG, deadline: float = None) -> bytes:
+        duration = max(self.MIN_DURATION, len(text) * self.SECONDS_PER_CHAR)
+        return silent_mp3(duration)
+
+
+class LatencyBackend(TTSBackend):
+    """
+    다른 백엔드를 감싸 요청마다 인위적인 지연을 넣는 벤치마크용 백엔드.
+    원격 TTS의 왕복 시간을 흉내내어 동시성/캐시 효과를 측정할 수 있습니다.
+    """
+
+    name = 'fake'
+
+    def __init__(self, inner: TTSBackend = None, latency_ms: int = FAKE_TTS_LATENCY_MS,
+                 jitter_ms: int = FAKE_TTS_JITTER_MS, error_rate: int = FAKE_TTS_ERROR_RATE):
+        self.inner = inner if inner is not None else LocalBackend()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    @property
+    def voice(self) -> str:
+        # local 백엔드가 채운 캐시에 적중해 지연 없이 끝나지 않도록 감싼 백엔드와 다른 캐시 키를 씀
+        return f"{self.name}:{self.inner.voice}"
+
+    def _fetch(self, text: str, lang: str) -> bytes:
+        delay_ms = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, delay_ms) / 1000.0)
+        if random.uniform(0, 100) < self.error_rate:
+            raise RateLimitError("429 Too Many Requests (fake)")
+        return self.inner.synthesize(text, lang)
+
+    def synthesize(self, text: str, lang: str = TTS_LANG, deadline: float = None) -> bytes:
+        return self._request(self._fetch, text, lang, deadline=deadline)
+
+
+class PostprocessBackend(TTSBackend):
+    """
+    합성 결과의 앞뒤 무음을 잘라내고 음량을 맞추는 백엔드.
+    처리 설정이 음성 식별자에 들어가므로 처리된 오디오는 원본과 다른 캐시 키로 한 번만 저장됩니다.
+    처리하지 못한 원본이 처리된 키로 저장되지 않도록 처리에 실패하면 예외가 그대로 발생합니다
+    (ffmpeg가 없는 환경은 create_backend에서 미리 확인해 이 백엔드를 쓰지 않음).
+    """
+
+    def __init__(self, inner: TTSBackend, threshold_db: int = AUDIO_SILENCE_THRESHOLD_DB,
+                 target_db: int = AUDIO_TARGET_LOUDNESS_DB):
+        self.inner = inner
+        self.threshold_db = threshold_db
+        self.target_db = target_db
+        self.name = inner.name
+
+    @property
+    def voice(self) -> str:
+        return f"{self.inner.voice}+trim{self.threshold_db}+norm{self.target_db}"
+
+    @property
+    def paused(self) -> bool:
+        return self.inner.paused
+
+    def synthesize(self, text: str, lang: str = TTS_LANG, deadline: float = None) -> bytes:
+        processed, peaks = process_speech_mp3(self.inner.synthesize(text, lang, deadline),
+                                              self.threshold_db, self.target_db)
+        audio = SynthesizedAudio(processed)
+        audio.peaks = peaks
+        return audio
+
+
+BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    LocalBackend.name: LocalBackend,
+    LatencyBackend.name: LatencyBackend,
+}
+
+
+def _postprocess_available() -> bool:
+    """짧은 무음 클립으로 후처리(디코딩/인코딩)를 할 수 있는 환경인지 확인합니다."""
+    try:
+        process_speech_mp3(silent_mp3(0.1))
+    except Exception:
+        return False
+    return True
+
+
+def create_backend(name: str = TTS_BACKEND, scheduled: bool = True) -> TTSBackend:
+    """
+    이름으로 TTS 백엔드를 생성합니다.
+
+    Args:
+        name: 'gtts', 'local', 'fake' 중 하나
+        scheduled: True면 원격 요청마다 요청 속도 제한/재시도/서킷 브레이커를 적용합니다.
+                   AUDIO_POSTPROCESS_ENABLED이고 후처리할 수 있는 환경이면 그 바깥을 PostprocessBackend로 감쌉니다.
+
+    Returns:
+        TTSBackend: 백엔드 인스턴스
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 TTS 백엔드입니다: {name} (사용 가능: {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]()
+    if not scheduled:
+        return backend
+
+    backend.scheduler = create_scheduler()
+    return PostprocessBackend(backend) if AUDIO_POSTPROCESS_ENABLED and _postprocess_available() else backend
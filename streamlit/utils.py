@@ -3,13 +3,54 @@ Utility functions for English sentence practice app
 영어 문장 반복 연습 프로그램 유틸리티 함수
 """
 
+import base64
+import difflib
+import json
+import re
+import time
+import unicodedata
+from bisect import bisect_right
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-from gtts import gTTS
 from io import BytesIO
 from datetime import datetime
 from pydub import AudioSegment
 
+from config import (
+    TTS_BACKEND,
+    TTS_MAX_WORKERS,
+    TTS_LANG,
+    TTS_KOREAN_LANG,
+    TTS_INTERACTIVE_TIMEOUT_MS,
+    AUDIO_CACHE_DIR,
+    AUDIO_CACHE_MAX_BYTES,
+    AUDIO_VARIANT_CACHE_DIR,
+    AUDIO_VARIANT_CACHE_MAX_BYTES,
+    AUDIO_MEMORY_MAX_BYTES,
+    TIME_STRETCH_ENABLED,
+    TRANSCODE_FORMATS,
+    AUDIO_SERVER_ENABLED,
+    AUDIO_SERVER_HOST,
+    AUDIO_SERVER_PORT,
+    AUDIO_SERVER_PUBLIC_URL,
+    CSV_CHUNK_ROWS,
+    DECK_CACHE_MAX_ENTRIES,
+    DECK_LIBRARY_PATH,
+)
+from audio_server import AudioServer
+from audio_store import AudioStore
+from deck import Deck
+from deck_library import DeckLibrary
+from deck_render import render_deck, parse_subtitles
+from disk_cache import DiskCache, make_cache_key, content_etag, file_digest
+from dsp import mp3_peaks, stretch_mp3, transcode
+from generation import GenerationJob, JobRegistry
+from search import SentenceIndex
+from mp3 import join_mp3, mp3_duration_us, silence_like
+from spreadsheet import iter_ods_rows, iter_xlsx_rows
+from tts_backends import TTSBackend, create_backend
+
 
 # ============================================================
 # 세션 상태 관리
@@ -19,8 +60,8 @@ def initialize_session_state():
     """모든 세션 상태 변수를 초기화합니다."""
 
     # 데이터 관련
-    if 'df' not in st.session_state:
-        st.session_state.df = None
+    if 'deck' not in st.session_state:
+        st.session_state.deck = None  # 현재 덱 (Deck)
     if 'current_index' not in st.session_state:
         st.session_state.current_index = 0
 
@@ -39,6 +80,12 @@ def initialize_session_state():
         st.session_state.loop_target = 5
     if 'shadowing_delay' not in st.session_state:
         st.session_state.shadowing_delay = 3
+    if 'shadowing_scale' not in st.session_state:
+        st.session_state.shadowing_scale = False
+
+    # 오디오 구성 ('en', 'en-ko', 'ko-en-en', AUDIO_PATTERNS 참고)
+    if 'audio_pattern' not in st.session_state:
+        st.session_state.audio_pattern = 'en'
 
     # 진행 추적
     if 'practice_stats' not in st.session_state:
@@ -51,10 +98,19 @@ def initialize_session_state():
         st.session_state.total_listens = 0
 
     # Audio cache
+    # 문장 내용 해시 기준이므로 다른 덱이나 다른 위치의 같은 문장도 오디오를 재사용
     if 'audio_cache' not in st.session_state:
-        st.session_state.audio_cache = {}  # {index: audio_bytes}
+        st.session_state.audio_cache = {}  # {text_hash: cache_key} (오디오 bytes는 공유 저장소에 보관)
     if 'audio_durations' not in st.session_state:
-        st.session_state.audio_durations = {}  # {index: duration_seconds}
+        st.session_state.audio_durations = {}  # {text_hash: duration_seconds}
+    if 'time_index' not in st.session_state:
+        st.session_state.time_index = None  # Time 열이 있는 덱의 (정렬된 시간, 행 순번)
+    if 'generation_job' not in st.session_state:
+        st.session_state.generation_job = None  # 백그라운드 오디오 생성 작업
+    if 'practice_parent' not in st.session_state:
+        st.session_state.practice_parent = None  # 검색 결과 연습 중일 때 (전체 덱, 행 순번, 연습 기록, 현재 위치)
+    if 'library_deck_id' not in st.session_state:
+        st.session_state.library_deck_id = None  # 오디오가 준비되면 재생 시간을 기록할 라이브러리 덱
 
 
 
@@ -63,21 +119,188 @@ def initialize_session_state():
 # 데이터 처리
 # ============================================================
 
-@st.cache_data
-def load_and_validate_csv(file) -> pd.DataFrame:
-    """CSV 파일을 로드하고 검증합니다."""
+REQUIRED_COLUMNS = ['English', 'Korean']
 
-    try:
-        df = pd.read_csv(file, encoding='utf-8')
+# 있으면 함께 읽는 열 (Time: 원본 영상/음성에서의 시작 시간)
+OPTIONAL_COLUMNS = ['Time']
 
-        # 필수 컬럼 확인
-        if 'English' not in df.columns or 'Korean' not in df.columns:
-            raise ValueError("CSV 파일은 'English'와 'Korean' 열이 필요합니다.")
+# 덱 파일에서 받아들이는 다른 열 이름 (자막 내보내기 형식 등)
+COLUMN_ALIASES = {
+    'Subtitle': 'English',
+    'Machine Translation': 'Korean',
+}
 
-        if df.empty:
-            raise ValueError("CSV 파일이 비어있습니다.")
+# 업로드할 수 있는 덱 파일 형식
+DECK_FILE_TYPES = ['csv', 'xlsx', 'ods', 'srt', 'vtt']
 
-        return df
+
+def parse_time_offsets(values: pd.Series) -> pd.Series:
+    """
+    Time 열 값을 초 단위 숫자로 한 번에 변환합니다.
+    '5s', '1m5s', '1h2m', '65', '1:05', '00:01:05,500' 형식을 지원하고, 해석할 수 없으면 NaN입니다.
+
+    Args:
+        values: Time 열
+
+    Returns:
+        pd.Series: 초 단위 float
+    """
+    text = values.astype(str).str.strip().str.lower().str.replace(',', '.', regex=False)
+
+    def seconds(parts: pd.DataFrame, weights) -> pd.Series:
+        parts = parts.apply(pd.to_numeric, errors='coerce')
+        total = sum(parts[column].fillna(0) * weight for column, weight in zip(parts.columns, weights))
+        return total.where(parts.notna().any(axis=1))
+
+    units = text.str.extract(r'^(?:(\d+(?:\.\d+)?)\s*h)?\s*(?:(\d+(?:\.\d+)?)\s*m)?\s*(?:(\d+(?:\.\d+)?)\s*s?)?$')
+    clock = text.str.extract(r'^(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)$')
+    return seconds(clock, (3600, 60, 1)).fillna(seconds(units, (3600, 60, 1))).astype(float)
+
+
+def _finish_batch(batch: pd.DataFrame) -> pd.DataFrame:
+    """행 묶음에서 English가 빈 행을 빼고 Time 열을 숫자로 바꿉니다."""
+    batch = batch[batch['English'].str.strip() != '']
+    if 'Time' in batch.columns:
+        batch = batch.assign(Time=parse_time_offsets(batch['Time']))
+    return batch
+
+
+def _resolve_columns(header) -> dict:
+    """
+    헤더에서 필수 열의 위치를 찾습니다. 같은 이름이 있으면 별칭보다 우선합니다.
+
+    Returns:
+        dict: {필수/선택 열 이름: 헤더 내 순번} (순번 순서)
+
+    Raises:
+        ValueError: 필수 열이 없는 경우
+    """
+    header = [str(name).strip().lstrip('\ufeff') for name in header]
+    positions = {}
+    for i, name in enumerate(header):
+        column = name if name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS else COLUMN_ALIASES.get(name)
+        if column is not None and (column not in positions or header[positions[column]] != column):
+            positions[column] = i
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise ValueError(f"덱 파일은 'English'와 'Korean' 열이 필요합니다. (없는 열: {', '.join(missing)})")
+    return dict(sorted(positions.items(), key=lambda item: item[1]))
+
+
+def iter_csv_batches(file, chunk_rows: int = CSV_CHUNK_ROWS):
+    """
+    CSV를 헤더부터 확인한 뒤 chunk_rows행씩 나눠 읽습니다.
+    필수 열이 없으면 본문을 읽기 전에 바로 실패하고, 필요한 두 열만 문자열로 읽으므로
+    메모리 사용량은 청크 크기로 제한됩니다.
+
+    Args:
+        file: CSV 파일 객체 (seek 가능)
+        chunk_rows: 한 번에 읽을 행 수
+
+    Yields:
+        pd.DataFrame: English, Korean (및 Time) 열만 있는 행 묶음 (English가 빈 행은 제외)
+
+    Raises:
+        ValueError: 필수 열이 없는 경우
+    """
+    positions = _resolve_columns(pd.read_csv(file, encoding='utf-8', nrows=0).columns)
+
+    file.seek(0)
+    chunks = pd.read_csv(
+        file,
+        encoding='utf-8',
+        usecols=list(positions.values()),
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunk_rows,
+    )
+    for chunk in chunks:
+        chunk.columns = list(positions)
+        chunk = _finish_batch(chunk)
+        if not chunk.empty:
+            yield chunk
+
+
+def iter_sheet_batches(rows, chunk_rows: int = CSV_CHUNK_ROWS):
+    """
+    스프레드시트 행 반복자를 헤더부터 확인한 뒤 chunk_rows행씩 DataFrame으로 묶습니다.
+
+    Args:
+        rows: 셀 문자열 튜플을 내는 반복자 (첫 행은 헤더)
+        chunk_rows: 한 묶음의 행 수
+
+    Yields:
+        pd.DataFrame: English, Korean (및 Time) 열만 있는 행 묶음 (English가 빈 행은 제외)
+
+    Raises:
+        ValueError: 필수 열이 없는 경우
+    """
+    rows = iter(rows)
+    positions = _resolve_columns(next(rows, ()))
+    columns = list(positions)
+    indices = list(positions.values())
+
+    batch = []
+    for row in rows:
+        batch.append(tuple(row[i] if i < len(row) else '' for i in indices))
+        if len(batch) >= chunk_rows:
+            yield _finish_batch(pd.DataFrame(batch, columns=columns))
+            batch = []
+    if batch:
+        yield _finish_batch(pd.DataFrame(batch, columns=columns))
+
+
+def deck_digest(file) -> str:
+    """업로드한 덱 파일 내용의 해시를 반환합니다 (파싱 캐시 키와 재업로드 판별에 사용)."""
+    return file_digest(file)
+
+
+@st.cache_data(max_entries=DECK_CACHE_MAX_ENTRIES, show_spinner=False)
+def _parse_deck(digest: str, file_type: str, _file) -> pd.DataFrame:
+    """
+    덱 파일을 형식에 맞는 스트리밍 리더로 읽습니다.
+    캐시 키는 (내용 해시, 형식)뿐이고 파일 객체는 해시하지 않으므로, 어느 세션에서든
+    같은 내용의 파일은 다시 파싱하지 않고 이름과 크기가 같아도 내용이 다르면 따로 파싱합니다.
+
+    Args:
+        digest: 파일 내용 해시 (deck_digest)
+        file_type: 확장자 ('csv', 'xlsx', 'ods', 'srt', 'vtt')
+        _file: 파일 객체 (캐시 적중 시에는 읽지 않음)
+    """
+    _file.seek(0)
+    if file_type == 'xlsx':
+        batches = iter_sheet_batches(iter_xlsx_rows(_file))
+    elif file_type == 'ods':
+        batches = iter_sheet_batches(iter_ods_rows(_file))
+    elif file_type in ('srt', 'vtt'):
+        cues = parse_subtitles(_file.read().decode('utf-8-sig'))
+        batches = [pd.DataFrame({
+            'English': [cue['text'] for cue in cues],
+            'Korean': [cue['korean'] for cue in cues],
+            'Time': [cue['start'] for cue in cues],
+        })] if cues else []
+    else:
+        batches = iter_csv_batches(_file)
+
+    batches = [batch for batch in batches if not batch.empty]
+    if not batches:
+        raise ValueError("덱 파일이 비어있습니다.")
+    return pd.concat(batches, ignore_index=True)
+
+
+def load_and_validate_file(file, digest: str = None) -> pd.DataFrame:
+    """
+    CSV/XLSX/ODS/SRT/VTT 덱 파일을 로드하고 검증합니다.
+
+    Args:
+        file: 업로드한 파일 객체
+        digest: 이미 계산한 내용 해시 (없으면 계산)
+    """
+
+    try:
+        file_type = file.name.rsplit('.', 1)[-1].lower()
+        return _parse_deck(digest or deck_digest(file), file_type, file)
 
     except Exception as e:
         st.error(f"파일을 읽는 중 오류가 발생했습니다: {str(e)}")
@@ -130,6 +353,84 @@ def parse_text_input(text: str, include_korean: bool = False, korean_text: str =
         return None
 
 
+def load_text_deck(text: str, max_workers: int = TTS_MAX_WORKERS) -> tuple:
+    """
+    Text Paste 입력을 이전에 붙여넣은 덱과 줄 단위로 비교하여 반영합니다.
+    바뀌지 않은 줄은 기존 행의 text_hash와 연습 기록을 그대로 옮기고, 추가/변경된 줄만
+    새로 해시하므로 생성 작업에서도 그 줄만 합성됩니다 (나머지는 캐시 적중).
+
+    Args:
+        text: 영어 문장들 (줄바꿈으로 구분)
+        max_workers: 동시에 실행할 TTS 요청 수
+
+    Returns:
+        tuple: (불러온 Deck 또는 None, 추가/변경된 줄 수)
+    """
+    _restore_practice_parent()
+    previous = st.session_state.deck
+    if previous is None or not str(st.session_state.get('loaded_file_id', '')).startswith('text_'):
+        df = parse_text_input(text)
+        if df is None:
+            return None, 0
+        load_deck(df, max_workers)
+        return st.session_state.deck, len(df)
+
+    lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+    if not lines:
+        st.error("텍스트 파싱 중 오류가 발생했습니다: 영어 문장을 입력해주세요.")
+        return None, 0
+
+    # 새 줄 순번 -> 같은 내용이었던 이전 행 순번 (추가/변경된 줄은 None)
+    old_rows = [None] * len(lines)
+    matcher = difflib.SequenceMatcher(None, previous.english, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            old_rows[j1:j2] = range(i1, i2)
+
+    changed = old_rows.count(None)
+    if changed == 0 and len(lines) == len(previous):
+        return previous, 0
+
+    row_hashes = [text_hash(line) if i is None else previous.hashes[i] for i, line in zip(old_rows, lines)]
+
+    # 연습 기록과 현재 위치를 새 행 순번으로 옮김
+    new_rows = {i: j for j, i in enumerate(old_rows) if i is not None}
+    st.session_state.practice_stats = {
+        new_rows[i]: stats for i, stats in st.session_state.practice_stats.items() if i in new_rows
+    }
+    current = st.session_state.current_index
+    st.session_state.current_index = new_rows.get(current, min(current, len(lines) - 1))
+
+    df = pd.DataFrame({'English': lines, 'Korean': [''] * len(lines)})
+    load_deck(df, max_workers, row_hashes=row_hashes)
+    return st.session_state.deck, changed
+
+
+def normalize_text(text: str) -> str:
+    """유니코드 정규화(NFC)와 공백 정리를 거친 문장을 반환합니다."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', str(text))).strip()
+
+
+def text_hash(text: str, lang: str = TTS_LANG) -> str:
+    """정규화한 문장의 내용 해시를 반환합니다. 기본 언어가 아니면 언어 코드도 포함합니다."""
+    if lang == TTS_LANG:
+        return make_cache_key(normalize_text(text))
+    return make_cache_key(normalize_text(text), lang)
+
+
+def get_row_duration(index: int):
+    """
+    현재 덱의 index번째 문장 오디오 재생 시간을 반환합니다.
+
+    Returns:
+        float: 재생 시간(초), 아직 준비되지 않았으면 None
+    """
+    deck = st.session_state.deck
+    if deck is None or index >= len(deck):
+        return None
+    return st.session_state.audio_durations.get(deck.hashes[index])
+
+
 def get_sentence_stats(index: int) -> dict:
     """특정 문장의 통계를 반환합니다."""
 
@@ -147,10 +448,10 @@ def get_sentence_stats(index: int) -> dict:
 def calculate_progress() -> tuple:
     """전체 진행률을 계산합니다. (마스터한 문장 수, 전체 문장 수, 진행률)"""
 
-    if st.session_state.df is None:
+    if st.session_state.deck is None:
         return 0, 0, 0.0
 
-    total = len(st.session_state.df)
+    total = len(st.session_state.deck)
     mastered = len(st.session_state.mastered_sentences)
     percentage = (mastered / total * 100) if total > 0 else 0.0
 
@@ -161,59 +462,898 @@ def calculate_progress() -> tuple:
 # 오디오 생성 및 재생
 # ============================================================
 
-@st.cache_data
-def _generate_base_audio(text: str) -> bytes:
+@st.cache_resource
+def get_audio_disk_cache() -> DiskCache:
+    """프로세스 전체에서 공유하는 오디오 디스크 캐시를 반환합니다."""
+    return DiskCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES)
+
+
+@st.cache_resource
+def get_variant_disk_cache() -> DiskCache:
+    """속도 변환 등 파생 오디오를 저장하는 디스크 캐시를 반환합니다 (기본 오디오와 별도로 제거)."""
+    return DiskCache(AUDIO_VARIANT_CACHE_DIR, AUDIO_VARIANT_CACHE_MAX_BYTES)
+
+
+def _load_from_disk(key: str):
+    """기본/파생 디스크 캐시에서 항목을 찾습니다."""
+    entry = get_audio_disk_cache().get(key)
+    if entry is None:
+        entry = get_variant_disk_cache().get(key)
+    return entry
+
+
+@st.cache_resource
+def get_audio_store() -> AudioStore:
+    """
+    모든 세션이 공유하는 메모리 오디오 저장소를 반환합니다.
+    같은 문장의 오디오는 세션 수와 관계없이 한 번만 메모리에 올라갑니다.
+    """
+    return AudioStore(AUDIO_MEMORY_MAX_BYTES, loader=_load_from_disk)
+
+
+def _cache_audio(disk_cache: DiskCache, key: str, data: bytes, meta: dict) -> dict:
+    """
+    오디오를 디스크 캐시와 공유 메모리 저장소에 함께 저장합니다.
+
+    Returns:
+        dict: 'etag'가 추가된 메타데이터
+    """
+    meta = disk_cache.put(key, data, meta)
+    get_audio_store().put(key, data, meta)
+    return meta
+
+
+@st.cache_resource
+def get_tts_backend() -> TTSBackend:
+    """설정(TTS_BACKEND)에 따라 선택된 TTS 백엔드를 반환합니다."""
+    return create_backend(TTS_BACKEND)
+
+
+def _audio_cache_key(text: str, lang: str = TTS_LANG) -> str:
+    """(정규화한 텍스트, 언어, 음성) 조합의 디스크 캐시 키를 반환합니다."""
+    return make_cache_key(normalize_text(text), lang, get_tts_backend().voice)
+
+
+def _generate_base_audio(text: str, lang: str = TTS_LANG) -> bytes:
     """
     기본 음성을 생성합니다 (속도 조절 없음).
+    화면이 기다리는 요청이므로 TTS_INTERACTIVE_TIMEOUT_MS 안에 끝내지 못하면 포기합니다
+    (요청 제한으로 멈춘 동안에는 백그라운드 생성만 기다리고, 재생 요청은 바로 오류를 표시).
 
     Args:
         text: 변환할 텍스트
+        lang: 언어 코드
 
     Returns:
         bytes: 기본 오디오 데이터
+
+    Raises:
+        SchedulerTimeout: 제한 시간 안에 요청을 보낼 수 없는 경우
+    """
+    deadline = time.monotonic() + TTS_INTERACTIVE_TIMEOUT_MS / 1000.0
+    return get_tts_backend().synthesize(text, lang, deadline=deadline)
+
+
+def get_audio_duration(audio_bytes: bytes) -> float:
+    """
+    MP3 재생 시간을 계산합니다.
+    프레임 헤더만 읽어 계산하고, 해석할 수 없는 경우에만 pydub로 전체 디코딩합니다.
+
+    Returns:
+        float: 재생 시간(초)
+    """
+    try:
+        return mp3_duration_us(audio_bytes) / 1_000_000
+    except ValueError:
+        fp = BytesIO(audio_bytes)
+        audio = AudioSegment.from_file(fp, format="mp3")
+        return len(audio) / 1000.0
+
+
+def _encode_peaks(audio_bytes: bytes) -> str:
+    """
+    파형 요약(int8 구간별 최대 진폭)을 계산해 메타데이터에 넣을 base64 문자열로 반환합니다.
+    후처리 백엔드가 이미 계산한 요약(SynthesizedAudio.peaks)이 있으면 다시 디코딩하지 않습니다.
+
+    Returns:
+        str: base64 문자열, 디코딩할 수 없으면 None
+    """
+    try:
+        peaks = getattr(audio_bytes, 'peaks', None)
+        if peaks is None:
+            peaks = mp3_peaks(audio_bytes)
+        return base64.b64encode(peaks.tobytes()).decode('ascii')
+    except Exception:
+        return None
+
+
+def _audio_meta(audio_bytes: bytes) -> dict:
+    """
+    새 기본 음성의 디스크 캐시 메타데이터를 만듭니다.
+    재생 시간과 파형 요약은 캐시를 채울 때 한 번만 계산하고 이후에는 캐시에서 읽습니다.
+    """
+    return {
+        'duration': get_audio_duration(audio_bytes),
+        'mime': 'audio/mpeg',
+        'peaks': _encode_peaks(audio_bytes),
+    }
+
+
+def get_row_peaks(index: int):
+    """
+    현재 덱의 index번째 문장 파형 요약을 반환합니다.
+    파형 요약 없이 캐시된 예전 항목은 한 번만 계산해 캐시에 다시 저장합니다.
+
+    Returns:
+        list: 0-127 범위의 구간별 최대 진폭, 준비되지 않았거나 계산할 수 없으면 None
+    """
+    deck = st.session_state.deck
+    if deck is None or index >= len(deck):
+        return None
+    key = st.session_state.audio_cache.get(deck.hashes[index])
+    entry = get_audio_store().get(key) if key is not None else None
+    if entry is None:
+        return None
+
+    data, meta = entry
+    if 'peaks' not in meta:
+        meta = _cache_audio(get_audio_disk_cache(), key, data, {**meta, 'peaks': _encode_peaks(data)})
+    if not meta['peaks']:
+        return None
+    return list(base64.b64decode(meta['peaks']))
+
+
+def _get_audio_entry(text: str, lang: str = TTS_LANG) -> tuple:
+    """
+    공유 메모리 저장소와 디스크 캐시를 거쳐 기본 음성을 가져옵니다.
+    어디에도 없을 때만 TTS를 호출하고 결과를 캐시에 저장합니다.
+
+    Args:
+        text: 변환할 텍스트
+        lang: 언어 코드
+
+    Returns:
+        tuple: (캐시 키, 오디오 데이터 bytes, 메타데이터 dict)
+    """
+    key = _audio_cache_key(text, lang)
+
+    entry = get_audio_store().get(key)
+    if entry is not None:
+        return key, entry[0], entry[1]
+
+    base_audio_bytes = _generate_base_audio(normalize_text(text), lang)
+    meta = _cache_audio(get_audio_disk_cache(), key, base_audio_bytes, _audio_meta(base_audio_bytes))
+
+    transcode_hook = _make_transcode_hook()
+    if transcode_hook is not None:
+        transcode_hook(base_audio_bytes)
+    return key, base_audio_bytes, meta
+
+
+def _generate_audio_with_duration(text: str, lang: str = TTS_LANG) -> tuple:
+    """
+    캐시를 거쳐 기본 음성과 재생 시간을 가져옵니다.
+
+    Args:
+        text: 변환할 텍스트
+        lang: 언어 코드
+
+    Returns:
+        tuple: (오디오 데이터 bytes, 재생 시간 float)
+    """
+    _, base_audio_bytes, meta = _get_audio_entry(text, lang)
+    return base_audio_bytes, meta['duration']
+
+
+# 오디오 구성별 재생 순서 ('en': 영어 문장, 'ko': 한국어 뜻)
+AUDIO_PATTERNS = {
+    'en': ('en',),
+    'en-ko': ('en', 'ko'),
+    'ko-en-en': ('ko', 'en', 'en'),
+}
+
+# 이중 언어 구성에서 부분 사이에 넣는 무음 길이(초)
+_BILINGUAL_PAUSE = 0.6
+
+
+def _get_bilingual_entry(english: str, korean: str, pattern: str = 'en') -> tuple:
+    """
+    캐시된 영어/한국어 음성을 pattern 순서로 이어붙인 오디오를 가져옵니다.
+    부분들은 다시 인코딩하지 않고 프레임 단위로 이어붙이며, 결과는 (부분 키, 구성) 단위로 캐시합니다.
+    한국어 문장이 비어 있거나 pattern이 'en'이면 영어 음성을 그대로 반환합니다.
+
+    Args:
+        english: 영어 문장
+        korean: 한국어 뜻
+        pattern: AUDIO_PATTERNS의 키
+
+    Returns:
+        tuple: (캐시 키, 오디오 데이터 bytes, 메타데이터 dict)
+    """
+    english_entry = _get_audio_entry(english)
+    if not isinstance(korean, str):
+        korean = ''  # CSV의 빈 칸(NaN)
+    if pattern == 'en' or not normalize_text(korean):
+        return english_entry
+
+    entries = {'en': english_entry, 'ko': _get_audio_entry(korean, TTS_KOREAN_LANG)}
+    order = AUDIO_PATTERNS[pattern]
+    key = make_cache_key('bilingual', [entries[part][0] for part in order], pattern)
+    entry = get_audio_store().get(key)
+    if entry is not None:
+        return key, entry[0], entry[1]
+
+    parts = []
+    for part in order:
+        clip = entries[part][1]
+        if parts:
+            parts.append(silence_like(clip, _BILINGUAL_PAUSE))
+        parts.append(clip)
+    audio, _ = join_mp3(parts)
+    meta = _cache_audio(get_variant_disk_cache(), key, audio, {
+        'duration': get_audio_duration(audio),
+        'mime': 'audio/mpeg',
+        'pattern': pattern,
+    })
+    return key, audio, meta
+
+
+@st.cache_resource
+def get_generation_jobs() -> JobRegistry:
+    """프로세스 전체에서 공유하는 백그라운드 생성 작업 목록을 반환합니다."""
+    return JobRegistry()
+
+
+def start_audio_generation(deck: Deck, max_workers: int = TTS_MAX_WORKERS, korean: bool = False) -> GenerationJob:
+    """
+    덱의 모든 문장에 대한 오디오 생성을 백그라운드에서 시작합니다.
+    스크립트가 다시 실행되어도 작업은 계속되며, 같은 덱의 작업은 세션 간에 공유됩니다.
+
+    Args:
+        deck: 문장 덱
+        max_workers: 동시에 실행할 TTS 요청 수
+        korean: True면 한국어 번역도 같은 작업에서 합성합니다 (영어 문장 뒤 순번)
+
+    Returns:
+        GenerationJob: 생성 작업 (st.session_state.generation_job에도 저장)
+    """
+    texts = [normalize_text(text) for text in deck.english]
+    langs = [TTS_LANG] * len(texts)
+    if korean:
+        korean_texts = [normalize_text(text) for text in deck.korean]
+        korean_texts = [text for text in korean_texts if text]
+        texts += korean_texts
+        langs += [TTS_KOREAN_LANG] * len(korean_texts)
+    keys = [_audio_cache_key(text, lang) for text, lang in zip(texts, langs)]
+
+    # 작업 스레드는 Streamlit 캐시 함수를 호출하지 않도록 필요한 객체를 미리 넘김
+    backend = get_tts_backend()
+    disk_cache = get_audio_disk_cache()
+
+    job = get_generation_jobs().get_or_start(
+        make_cache_key('generation', keys),
+        lambda: GenerationJob(texts, keys, backend, disk_cache, _audio_meta,
+                              max_workers=max_workers, langs=langs, on_cached=_make_transcode_hook()),
+    )
+    st.session_state.generation_job = job
+    return job
+
+
+def sync_generated_audio(deck: Deck):
+    """
+    백그라운드 작업에서 준비된 오디오를 세션 캐시와 덱의 재생 시간 표시에 반영합니다.
+
+    Args:
+        deck: 작업을 시작한 덱
+
+    Returns:
+        GenerationJob: 현재 세션의 생성 작업 (없으면 None)
+    """
+    job = st.session_state.get('generation_job')
+    if job is None or job.total < len(deck):
+        return None
+
+    # 세션에는 캐시 키와 재생 시간만 기록 (오디오는 필요할 때 공유 저장소에서 읽음)
+    for i, duration in job.ready_items().items():
+        if i < len(deck):
+            h = deck.hashes[i]
+            deck.set_duration(i, duration)
+        else:
+            h = text_hash(job.texts[i], job.langs[i])
+        if h not in st.session_state.audio_cache:
+            st.session_state.audio_cache[h] = job.keys[i]
+            st.session_state.audio_durations[h] = duration
+
+    # 라이브러리 덱은 생성이 끝나면 재생 시간을 한 번 기록 (다음에 불러올 때 바로 재생 가능)
+    if job.done and st.session_state.library_deck_id is not None:
+        ready = {i: duration for i, duration in job.ready_items().items() if i < len(deck)}
+        get_deck_library().record_durations(st.session_state.library_deck_id, ready)
+        st.session_state.library_deck_id = None
+
+    return job
+
+
+def get_generation_status(index: int) -> str:
+    """
+    현재 덱에서 특정 문장의 오디오 준비 상태를 반환합니다.
+
+    Returns:
+        str: 'ready', 'pending', 'failed' 중 하나
     """
-    tts = gTTS(text=text, lang='en', slow=False)
-    fp = BytesIO()
-    tts.write_to_fp(fp)
-    fp.seek(0)
-    return fp.getvalue()
+    deck = st.session_state.deck
+    if deck is not None and index < len(deck) and deck.hashes[index] in st.session_state.audio_cache:
+        return GenerationJob.READY
+
+    job = st.session_state.get('generation_job')
+    if job is None or index >= job.total:
+        return GenerationJob.PENDING
+    return job.status(index)
+
 
+def is_tts_paused() -> bool:
+    """TTS 제공자의 요청 제한으로 생성 대기열이 잠시 멈춰 있는지 여부를 반환합니다."""
+    return get_tts_backend().paused
 
-def pregenerate_audio(df):
+
+def load_deck(df, max_workers: int = TTS_MAX_WORKERS, row_hashes: list = None) -> GenerationJob:
     """
-    DataFrame의 모든 문장에 대해 기본 오디오를 미리 생성하여 캐시에 저장합니다.
+    불러온 덱을 압축된 Deck으로 바꿔 세션에 설정하고 백그라운드 오디오 생성을 시작합니다.
+    행별 text_hash를 함께 저장하므로 이전 덱과 같은 문장은 오디오를 그대로 재사용하고,
+    내용이 바뀐 문장만 새로 합성됩니다.
 
     Args:
         df: English 컬럼이 있는 pandas DataFrame
+        max_workers: 동시에 실행할 TTS 요청 수
+        row_hashes: 이미 계산한 행별 text_hash (없으면 계산)
+
+    Returns:
+        GenerationJob: 생성 작업
+    """
+    _restore_practice_parent()
+    deck = Deck.from_frame(df, row_hashes or [text_hash(text) for text in df['English']])
+    for i, h in enumerate(deck.hashes):
+        if h in st.session_state.audio_durations:
+            deck.set_duration(i, st.session_state.audio_durations[h])
+
+    st.session_state.deck = deck
+    st.session_state.time_index = deck.time_index()
+    st.session_state.library_deck_id = None
+    return start_audio_generation(deck, max_workers, korean=st.session_state.audio_pattern != 'en')
+
+
+# ============================================================
+# 덱 라이브러리
+# ============================================================
+
+@st.cache_resource
+def get_deck_library() -> DeckLibrary:
+    """프로세스 전체에서 공유하는 SQLite 덱 라이브러리를 반환합니다."""
+    return DeckLibrary(DECK_LIBRARY_PATH)
+
+
+def list_library_decks() -> list:
+    """라이브러리에 저장된 덱 목록을 최근 사용 순으로 반환합니다."""
+    return get_deck_library().list_decks()
+
+
+def save_to_library(deck_id: str, name: str):
+    """
+    현재 세션의 덱을 라이브러리에 저장합니다.
+    아직 준비되지 않은 오디오의 재생 시간은 생성이 끝난 뒤 sync_generated_audio에서 기록합니다.
+
+    Args:
+        deck_id: 덱 식별자 (업로드 파일 내용 해시)
+        name: 표시 이름
+    """
+    deck = st.session_state.deck
+    keys = [_audio_cache_key(text) for text in deck.english]
+    durations = [st.session_state.audio_durations.get(h) for h in deck.hashes]
+    get_deck_library().save(deck_id, name, get_tts_backend().voice, deck, keys, durations)
+    st.session_state.library_deck_id = deck_id if None in durations else None
+
+
+def load_from_library(deck_id: str, max_workers: int = TTS_MAX_WORKERS):
+    """
+    라이브러리의 덱을 파싱 없이 불러옵니다.
+    저장된 오디오 키가 디스크 캐시에 남아 있으면 세션 캐시를 바로 채우고,
+    모든 문장의 오디오가 준비되어 있으면 생성 작업을 시작하지 않습니다.
+
+    Args:
+        deck_id: 덱 식별자
+        max_workers: 동시에 실행할 TTS 요청 수
+
+    Returns:
+        Deck: 불러온 덱, 라이브러리에 없으면 None
+    """
+    entry = get_deck_library().load(deck_id)
+    if entry is None:
+        return None
+    deck, meta = entry
+    _restore_practice_parent()
+
+    # 다른 음성으로 만든 오디오 키는 쓰지 않음
+    disk_cache = get_audio_disk_cache()
+    same_voice = meta['voice'] == get_tts_backend().voice
+    missing = False
+    for i, (h, key, duration) in enumerate(zip(deck.hashes, meta['audio_keys'], meta['durations'])):
+        if same_voice and duration is not None and key in disk_cache:
+            st.session_state.audio_cache.setdefault(h, key)
+            st.session_state.audio_durations.setdefault(h, duration)
+        if h in st.session_state.audio_durations:
+            deck.set_duration(i, st.session_state.audio_durations[h])
+        else:
+            missing = True
+
+    st.session_state.deck = deck
+    st.session_state.time_index = deck.time_index()
+    st.session_state.library_deck_id = deck_id if missing else None
+
+    korean = st.session_state.audio_pattern != 'en'
+    if missing or korean:
+        start_audio_generation(deck, max_workers, korean=korean)
+    else:
+        st.session_state.generation_job = None
+    return deck
+
+
+# ============================================================
+# 문장 검색
+# ============================================================
+
+@st.cache_resource(max_entries=DECK_CACHE_MAX_ENTRIES)
+def _get_search_index(deck_key: str, _deck: Deck) -> SentenceIndex:
+    """덱 내용 해시별로 한 번만 만드는 검색 색인 (같은 덱을 불러온 세션끼리 공유)."""
+    return SentenceIndex(_deck.english, _deck.korean)
+
+
+def search_deck(query: str) -> list:
+    """
+    현재 덱에서 검색어의 모든 단어가 들어간 문장(영어 또는 한국어)을 찾습니다.
+
+    Args:
+        query: 검색어 (마지막 단어는 접두사로 찾음)
+
+    Returns:
+        list: 오름차순 행 순번
+    """
+    deck = st.session_state.deck
+    return _get_search_index(deck.key, deck).search(query).tolist()
+
+
+def start_practice_set(rows: list, max_workers: int = TTS_MAX_WORKERS):
+    """
+    현재 덱에서 rows 순번의 문장만 모아 연습합니다. 오디오는 캐시에서 그대로 재사용하고,
+    연습 기록은 end_practice_set에서 전체 덱으로 돌려놓습니다.
+
+    Args:
+        rows: 현재 덱의 행 순번 목록 (search_deck 결과)
+        max_workers: 동시에 실행할 TTS 요청 수
+    """
+    if not rows:
+        return
+
+    # 연습 세트 안에서 다시 고르면 전체 덱 기준 순번으로 바꿈
+    parent = st.session_state.practice_parent
+    if parent is not None:
+        _restore_practice_parent()
+        rows = [parent[1][i] for i in rows]
+    deck = st.session_state.deck
+    stats = st.session_state.practice_stats
+
+    st.session_state.practice_parent = (deck, rows, stats, st.session_state.current_index)
+    st.session_state.practice_stats = {j: stats[i] for j, i in enumerate(rows) if i in stats}
+    st.session_state.current_index = 0
+
+    subset = deck.subset(rows)
+    st.session_state.deck = subset
+    st.session_state.time_index = subset.time_index()
+    start_audio_generation(subset, max_workers, korean=st.session_state.audio_pattern != 'en')
+
+
+def end_practice_set(max_workers: int = TTS_MAX_WORKERS):
+    """검색 결과 연습을 끝내고 전체 덱과 (연습 중 쌓인 기록을 합친) 연습 기록으로 돌아갑니다."""
+    if st.session_state.practice_parent is None:
+        return
+
+    _restore_practice_parent()
+    start_audio_generation(st.session_state.deck, max_workers, korean=st.session_state.audio_pattern != 'en')
+
+
+def _restore_practice_parent():
+    """
+    연습 중이면 세션을 전체 덱과 연습 기록으로 되돌립니다 (생성 작업은 시작하지 않음).
+    새 덱을 불러오기 전에 호출해, 연습 세트가 아닌 전체 덱과 비교하고 전체 덱의 기록을 잃지 않도록 합니다.
+    """
+    parent = st.session_state.practice_parent
+    if parent is None:
+        return
+
+    deck, rows, stats, current_index = parent
+    for j, row_stats in st.session_state.practice_stats.items():
+        stats[rows[j]] = row_stats
+
+    st.session_state.practice_parent = None
+    st.session_state.practice_stats = stats
+    st.session_state.current_index = rows[st.session_state.current_index] \
+        if st.session_state.current_index < len(rows) else current_index
+    st.session_state.deck = deck
+    st.session_state.time_index = deck.time_index()
+
+
+def load_deck_file(file, digest: str):
+    """
+    업로드한 덱 파일을 불러옵니다. 같은 내용의 파일이 라이브러리에 있으면 파싱하지 않고
+    라이브러리에서 불러오고, 처음 보는 파일이면 파싱한 뒤 라이브러리에 저장합니다.
+
+    Args:
+        file: 업로드한 파일 객체
+        digest: 파일 내용 해시 (deck_digest)
+
+    Returns:
+        Deck: 불러온 덱, 읽을 수 없으면 None
+    """
+    if digest in get_deck_library():
+        return load_from_library(digest)
+
+    df = load_and_validate_file(file, digest)
+    if df is None:
+        return None
+    load_deck(df)
+    save_to_library(digest, file.name)
+    return st.session_state.deck
+
+
+def get_row_at_time(seconds: float):
     """
-    import streamlit as st
-    import time
+    현재 덱에서 재생 시간 seconds에 해당하는 문장의 행 순번을 이진 탐색으로 찾습니다.
+    첫 문장보다 앞선 시간이면 첫 문장을 반환합니다.
 
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    Returns:
+        int: 행 순번, 덱에 Time 정보가 없으면 None
+    """
+    index = st.session_state.time_index
+    if index is None:
+        return None
+    times, rows = index
+    return rows[max(bisect_right(times, seconds) - 1, 0)]
 
-    for idx, row in df.iterrows():
-        if idx not in st.session_state.audio_cache:
-            status_text.text(f"오디오 생성 중... {idx + 1}/{len(df)}")
 
-            # 기본 오디오 생성 (속도 조절 없이)
-            base_audio_bytes = _generate_base_audio(row['English'])
+def set_audio_pattern(pattern: str):
+    """
+    오디오 구성을 바꿉니다. 한국어가 들어간 구성을 처음 고르면
+    현재 덱의 Korean 컬럼 합성을 백그라운드 작업에 추가합니다 (이미 만든 영어 오디오는 캐시에서 재사용).
 
-            # 오디오 길이 계산
-            fp = BytesIO(base_audio_bytes)
-            audio = AudioSegment.from_file(fp, format="mp3")
-            duration = len(audio) / 1000.0
+    Args:
+        pattern: AUDIO_PATTERNS의 키
+    """
+    st.session_state.audio_pattern = pattern
+    if pattern == 'en' or st.session_state.deck is None:
+        return
 
-            # 캐시에 저장
-            st.session_state.audio_cache[idx] = base_audio_bytes
-            st.session_state.audio_durations[idx] = duration
+    job = st.session_state.get('generation_job')
+    if job is None or TTS_KOREAN_LANG not in job.langs:
+        start_audio_generation(st.session_state.deck, korean=True)
 
-        progress_bar.progress((idx + 1) / len(df))
 
-    status_text.text("✓ 모든 오디오 생성 완료!")
-    time.sleep(0.5)
-    progress_bar.empty()
-    status_text.empty()
+@st.cache_resource
+def get_audio_server():
+    """
+    디스크 캐시의 오디오를 제공하는 HTTP 서버를 프로세스당 한 번 시작합니다.
+
+    Returns:
+        AudioServer: 비활성화되었거나 포트를 열 수 없으면 None
+    """
+    if not AUDIO_SERVER_ENABLED:
+        return None
+
+    try:
+        return AudioServer(
+            get_audio_store().get,
+            AUDIO_SERVER_HOST,
+            AUDIO_SERVER_PORT,
+            AUDIO_SERVER_PUBLIC_URL,
+        )
+    except OSError:
+        return None
+
+
+def _entry_src(key: str, data: bytes, meta: dict) -> str:
+    """디스크 캐시 항목의 오디오 서버 URL을, 서버가 없으면 base64 data URI를 반환합니다."""
+    server = get_audio_server()
+    if server is None:
+        import base64
+        return f"data:{meta.get('mime', 'audio/mpeg')};base64,{base64.b64encode(data).decode()}"
+    return server.url_for(key, meta)
+
+
+def _get_speed_variant(audio_bytes: bytes, speed: float) -> tuple:
+    """
+    음높이를 유지한 속도 변환 오디오를 (내용 해시, 속도) 단위로 한 번만 렌더링합니다.
+
+    Returns:
+        tuple: (캐시 키, 오디오 데이터 bytes, 메타데이터 dict)
+    """
+    speed = round(speed, 2)
+    key = make_cache_key('speed', content_etag(audio_bytes), speed)
+    entry = get_audio_store().get(key)
+    if entry is not None:
+        return key, entry[0], entry[1]
+
+    stretched = stretch_mp3(audio_bytes, speed)
+    meta = _cache_audio(get_variant_disk_cache(), key, stretched, {
+        'duration': get_audio_duration(stretched),
+        'mime': 'audio/mpeg',
+        'speed': speed,
+    })
+    return key, stretched, meta
+
+
+def _transcode_key(audio_bytes: bytes, fmt: str) -> str:
+    """(내용 해시, 형식) 조합의 변환본 캐시 키를 반환합니다."""
+    return make_cache_key('transcode', content_etag(audio_bytes), fmt)
+
+
+@st.cache_resource
+def get_unavailable_formats() -> set:
+    """
+    변환에 실패한 형식(ffmpeg에 해당 인코더가 없는 등) 목록을 반환합니다.
+    재생할 때마다 ffmpeg를 다시 실행하지 않도록 프로세스 전체에서 공유합니다.
+    """
+    return set()
+
+
+def _make_transcode_hook():
+    """
+    기본 오디오의 저비트레이트 변환본(TRANSCODE_FORMATS)을 만들어 파생 캐시에 저장하는 함수를 반환합니다.
+    백그라운드 작업 스레드에서도 쓸 수 있도록 필요한 캐시 객체를 미리 잡아 둡니다.
+
+    Returns:
+        callable: audio_bytes를 받는 함수, 변환이 꺼져 있거나 변환본을 제공할 오디오 서버가 없으면 None
+    """
+    if not TRANSCODE_FORMATS or get_audio_server() is None:
+        return None
+
+    variant_cache = get_variant_disk_cache()
+    store = get_audio_store()
+    unavailable = get_unavailable_formats()
+
+    def transcode_variants(audio_bytes: bytes):
+        for fmt in TRANSCODE_FORMATS:
+            if fmt in unavailable:
+                continue
+            key = _transcode_key(audio_bytes, fmt)
+            if key in variant_cache:
+                continue
+            try:
+                data, mime, source_type = transcode(audio_bytes, fmt)
+            except Exception:
+                # ffmpeg에 해당 인코더가 없으면 이후로는 이 형식을 만들지 않고 MP3만 사용
+                unavailable.add(fmt)
+                continue
+            meta = variant_cache.put(key, data, {'mime': mime, 'source_type': source_type})
+            store.put(key, data, meta)
+
+    return transcode_variants
+
+
+def _get_transcoded_sources(audio_bytes: bytes) -> list:
+    """
+    기본 오디오의 변환본 주소 목록을 반환합니다.
+    캐시를 채울 때 만들어지지 않은 변환본(변환 기능을 켜기 전의 오디오 등)은 여기서 한 번 만듭니다.
+
+    Returns:
+        list: [(오디오 URL, <source> type), ...]
+    """
+    formats = [fmt for fmt in TRANSCODE_FORMATS if fmt not in get_unavailable_formats()]
+    if not formats:
+        return []
+
+    store = get_audio_store()
+    keys = [_transcode_key(audio_bytes, fmt) for fmt in formats]
+    if any(store.get(key) is None for key in keys):
+        _make_transcode_hook()(audio_bytes)
+
+    sources = []
+    for key in keys:
+        entry = store.get(key)
+        if entry is not None:
+            data, meta = entry
+            sources.append((_entry_src(key, data, meta), meta['source_type']))
+    return sources
+
+
+def _source_tags(sources) -> str:
+    """(주소, type) 목록을 <source> 태그들로 변환합니다. 브라우저는 재생 가능한 첫 번째 형식을 고릅니다."""
+    return '\n'.join(f'<source src="{src}" type="{source_type}">' for src, source_type in sources)
+
+
+def get_playback_source(key: str, audio_bytes: bytes, meta: dict, speed: float) -> tuple:
+    """
+    재생할 오디오 주소들과 브라우저 playbackRate를 결정합니다.
+    오디오 서버가 있으면 브라우저가 캐시할 수 있는 고정 URL을, 없으면 base64 data URI를 사용합니다.
+    TIME_STRETCH_ENABLED이면 서버에서 렌더링한 속도 변환 오디오를 1.0배속으로 재생합니다.
+    TRANSCODE_FORMATS가 있고 오디오 서버가 있으면 더 작은 Opus/AAC 변환본을 MP3보다 앞에 두어
+    브라우저가 지원하는 가장 작은 형식을 고르게 합니다. 서버가 없으면 모든 형식이 data URI로
+    함께 전송되어 오히려 커지므로 MP3 하나만 넣습니다.
+
+    Args:
+        key: 기본 오디오의 캐시 키
+        audio_bytes: 기본 오디오 데이터
+        meta: 기본 오디오의 메타데이터
+        speed: 재생 속도
+
+    Returns:
+        tuple: ([(오디오 URL, <source> type), ...] 선호 순, playbackRate, 실제 재생 시간)
+            마지막 항목은 항상 MP3입니다.
+    """
+    if TIME_STRETCH_ENABLED and speed != 1.0:
+        try:
+            key, stretched, meta = _get_speed_variant(audio_bytes, speed)
+            return [(_entry_src(key, stretched, meta), 'audio/mp3')], 1.0, meta['duration']
+        except Exception:
+            # ffmpeg가 없는 등 렌더링할 수 없으면 브라우저 속도 조절로 대체
+            pass
+
+    sources = _get_transcoded_sources(audio_bytes) if get_audio_server() is not None else []
+    sources.append((_entry_src(key, audio_bytes, meta), 'audio/mp3'))
+    return sources, speed, meta['duration'] / speed
+
+
+def render_deck_audio(deck: Deck, gap: float = 0.0, gap_scale: float = 0.0, pattern: str = 'en') -> tuple:
+    """
+    덱 전체를 하나의 트랙으로 렌더링하여 파생 오디오 디스크 캐시에 저장합니다.
+    같은 문장 구성(과 무음/오디오 구성 설정)의 덱은 다시 렌더링하지 않습니다.
+    트랙은 공유 저장소에서만 읽고 세션에는 보관하지 않습니다 (서버가 없을 때 세션마다 트랙 사본이 남지 않도록).
+    스크립트 스레드에서 TTS를 호출하지 않도록 오디오가 이미 준비된 문장만 트랙에 넣습니다.
+
+    Args:
+        deck: 문장 덱
+        gap: 섀도잉용으로 문장마다 뒤에 넣을 무음 길이(초)
+        gap_scale: 문장 길이에 비례해 더할 무음 비율
+        pattern: 문장별 오디오 구성 (AUDIO_PATTERNS의 키)
+
+    Returns:
+        tuple: (트랙 오디오 URL, 큐 시트 list, 빠진 문장 행 순번 list)
+            큐의 'index'는 덱 내 행 순번이며, 준비된 문장이 없으면 URL은 None
+    """
+    rows, missing = [], []
+    for i, (text, korean) in enumerate(zip(deck.english, deck.korean)):
+        ready = deck.hashes[i] in st.session_state.audio_cache
+        if ready and pattern != 'en' and normalize_text(korean):
+            ready = text_hash(korean, TTS_KOREAN_LANG) in st.session_state.audio_cache
+        (rows if ready else missing).append(i)
+    if not rows:
+        return None, [], missing
+
+    texts = [deck.english[i] for i in rows]
+    koreans = [deck.korean[i] for i in rows] if pattern != 'en' else [''] * len(rows)
+
+    key_parts = [[_audio_cache_key(text) for text in texts]]
+    if pattern != 'en':
+        key_parts += [pattern, [_audio_cache_key(text, TTS_KOREAN_LANG) for text in koreans]]
+    if gap > 0 or gap_scale > 0:
+        deck_key = make_cache_key('shadow-deck', *key_parts, round(gap, 2), round(gap_scale, 2))
+    else:
+        deck_key = make_cache_key('deck', *key_parts)
+
+    entry = get_audio_store().get(deck_key)
+    if entry is not None:
+        track, meta = entry
+    else:
+        clips = [_get_bilingual_entry(text, korean, pattern)[1] for text, korean in zip(texts, koreans)]
+        track, cues = render_deck(clips, texts, gap, gap_scale)
+        # 덱 트랙은 크고 다시 만들 수 있으므로 문장 오디오를 밀어내지 않도록 파생 캐시에 저장
+        meta = _cache_audio(get_variant_disk_cache(), deck_key, track, {
+            'duration': get_audio_duration(track) if cues else 0.0,
+            'mime': 'audio/mpeg',
+            'cues': cues,
+        })
+
+    cues = [{**cue, 'index': rows[cue['index']]} for cue in meta['cues']]
+    return _entry_src(deck_key, track, meta), cues, missing
+
+
+def play_deck_loop(deck: Deck, speed: float = 1.0, loop_target: int = 1,
+                   gap: float = 0.0, gap_scale: float = 0.0, pattern: str = 'en') -> list:
+    """
+    덱 전체 트랙을 끊김 없이 반복 재생하는 플레이어를 표시합니다.
+    현재 문장은 브라우저에서 currentTime과 큐 시트만으로 표시하므로 서버 왕복이 없습니다.
+    gap을 주면 문장 사이에 따라 말할 무음이 들어간 섀도잉 트랙을 재생합니다.
+
+    Args:
+        deck: 문장 덱
+        speed: 재생 속도 (0.5-2.0)
+        loop_target: 반복 횟수
+        gap: 문장 뒤 무음 길이(실제 재생 시간 기준 초)
+        gap_scale: 문장 길이에 비례해 더할 무음 비율
+        pattern: 문장별 오디오 구성 (AUDIO_PATTERNS의 키)
+
+    Returns:
+        tuple: (큐 시트 list, 오디오가 없어 트랙에서 빠진 문장 행 순번 list)
+    """
+    # 브라우저 playbackRate가 무음도 빠르게/느리게 재생하므로 실제 대기 시간이 gap이 되도록 보정
+    src, cues, missing = render_deck_audio(deck, gap * speed, gap_scale, pattern)
+    if src is None:
+        return cues, missing
+    korean = [deck.korean[cue['index']] for cue in cues]
+
+    player_html = f"""
+    <style>
+        body {{ margin: 0; font-family: 'Outfit', sans-serif; color: #ffffff; }}
+        .deck-player {{ background: #0d1128; border-radius: 12px; padding: 16px; }}
+        .deck-status {{ color: #a0aec0; font-family: 'JetBrains Mono', monospace; font-size: 12px; margin-bottom: 8px; }}
+        .deck-english {{ color: #64ffda; font-size: 18px; font-weight: 600; min-height: 26px; }}
+        .deck-korean {{ color: #a0aec0; font-size: 14px; margin-top: 4px; min-height: 20px; }}
+        audio {{ width: 100%; margin-top: 12px; }}
+    </style>
+    <div class="deck-player">
+        <div class="deck-status" id="deck-status"></div>
+        <div class="deck-english" id="deck-english"></div>
+        <div class="deck-korean" id="deck-korean"></div>
+        <audio id="deck-audio" src="{src}" controls preload="auto"></audio>
+    </div>
+    <script>
+        (function() {{
+            var cues = {json.dumps(cues)};
+            var korean = {json.dumps(korean, ensure_ascii=False)};
+            var loopTarget = {int(loop_target)};
+            var loops = 0;
+            var current = -1;
+
+            var audio = document.getElementById('deck-audio');
+            var status = document.getElementById('deck-status');
+            var english = document.getElementById('deck-english');
+            var koreanText = document.getElementById('deck-korean');
+
+            audio.defaultPlaybackRate = {speed};
+            audio.playbackRate = {speed};
+
+            // 시작 시간이 정렬되어 있으므로 이진 탐색으로 현재 문장을 찾음
+            function cueAt(t) {{
+                var lo = 0, hi = cues.length - 1, found = 0;
+                while (lo <= hi) {{
+                    var mid = (lo + hi) >> 1;
+                    if (cues[mid].start <= t) {{ found = mid; lo = mid + 1; }} else {{ hi = mid - 1; }}
+                }}
+                return found;
+            }}
+
+            function render() {{
+                status.textContent = 'LOOP ' + Math.min(loops + 1, loopTarget) + ' / ' + loopTarget +
+                    '  •  ' + (current + 1) + ' of ' + cues.length;
+            }}
+
+            function update() {{
+                var i = cueAt(audio.currentTime);
+                if (i !== current && cues.length) {{
+                    current = i;
+                    english.textContent = cues[i].text;
+                    koreanText.textContent = korean[i] || '';
+                    render();
+                }}
+            }}
+
+            audio.addEventListener('timeupdate', update);
+            audio.addEventListener('seeked', update);
+            audio.addEventListener('ended', function() {{
+                loops += 1;
+                if (loops < loopTarget) {{
+                    audio.currentTime = 0;
+                    audio.play();
+                }}
+                render();
+            }});
+
+            update();
+            audio.play().catch(function(error) {{
+                console.log('Auto-play prevented:', error);
+            }});
+        }})();
+    </script>
+    """
+
+    components.html(player_html, height=190)
+    return cues, missing
 
 
 def generate_audio(text: str, speed: float = 1.0) -> tuple:
@@ -228,13 +1368,8 @@ def generate_audio(text: str, speed: float = 1.0) -> tuple:
     Returns:
         tuple: (오디오 데이터 bytes, 재생 시간 float)
     """
-    # 기본 오디오 생성 (캐싱됨)
-    base_audio_bytes = _generate_base_audio(text)
-
-    # 오디오 길이 계산
-    fp = BytesIO(base_audio_bytes)
-    audio = AudioSegment.from_file(fp, format="mp3")
-    base_duration = len(audio) / 1000.0
+    # 기본 오디오 생성 (캐싱됨) 및 길이 계산
+    base_audio_bytes, base_duration = _generate_audio_with_duration(text)
 
     # 속도를 고려한 실제 재생 시간 계산
     duration = base_duration / speed
@@ -250,29 +1385,25 @@ def play_audio_with_stats(text: str, index: int, speed: float = 1.0, autoplay: b
     """
 
     try:
-        # 캐시에서 오디오를 가져오거나 생성
-        if index in st.session_state.audio_cache:
-            audio_bytes = st.session_state.audio_cache[index]
-            base_duration = st.session_state.audio_durations[index]
-            # 속도에 따른 재생 시간 계산
-            duration = base_duration / speed
-        else:
-            # 캐시에 없으면 생성 (fallback)
-            audio_bytes, duration = generate_audio(text, speed)
+        # 공유 저장소에서 오디오를 가져오거나 생성 (세션에는 캐시 키만 보관)
+        key, audio_bytes, meta = _get_audio_entry(text)
+        st.session_state.audio_cache[text_hash(text)] = key
+        st.session_state.audio_durations[text_hash(text)] = meta['duration']
+
+        # 속도에 따른 재생 시간 계산
+        audio_sources, playback_rate, duration = get_playback_source(key, audio_bytes, meta, speed)
 
         if autoplay:
             # 간단하고 확실한 HTML5 오디오 플레이어 사용
-            import base64
             import time as time_module
             import random
-            audio_base64 = base64.b64encode(audio_bytes).decode()
 
             # 고유한 ID 생성 (timestamp + random으로 더 확실하게)
             unique_id = f"audio_{int(time_module.time() * 1000)}_{random.randint(1000, 9999)}"
 
             audio_html = f"""
                 <audio id="{unique_id}" autoplay style="display: none;">
-                    <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
+                    {_source_tags(audio_sources)}
                 </audio>
                 <script>
                     (function() {{
@@ -290,7 +1421,7 @@ def play_audio_with_stats(text: str, index: int, speed: float = 1.0, autoplay: b
                         var audio = document.getElementById('{unique_id}');
                         if (audio) {{
                             // 재생 속도 설정
-                            audio.playbackRate = {speed};
+                            audio.playbackRate = {playback_rate};
 
                             // 현재 재생 중인 오디오로 설정
                             window.currentAudioElement = audio;
@@ -337,7 +1468,7 @@ def play_audio_with_stats(text: str, index: int, speed: float = 1.0, autoplay: b
                 st.markdown(audio_html, unsafe_allow_html=True)
         else:
             # 일반 오디오 플레이어 표시
-            st.audio(audio_bytes, format='audio/mp3')
+            st.audio(audio_sources[-1][0] if get_audio_server() is not None else audio_bytes, format='audio/mp3')
 
         # 통계 업데이트
         st.session_state.total_listens += 1
@@ -366,37 +1497,37 @@ def play_audio_with_stats(text: str, index: int, speed: float = 1.0, autoplay: b
 # ============================================================
 
 
-def play_audio_with_stats_v2(text: str, index: int, speed: float = 1.0, audio_placeholder=None) -> float:
+def play_audio_with_stats_v2(text: str, index: int, speed: float = 1.0, audio_placeholder=None,
+                             korean: str = None, pattern: str = 'en') -> float:
     """오디오를 재생합니다.
+    pattern이 'en'이 아니면 캐시된 영어/한국어 음성을 이어붙인 오디오를 재생합니다.
 
     Returns:
         float: 오디오 재생 시간(초)
     """
 
     try:
-        # 캐시에서 오디오를 가져오거나 생성
-        if index in st.session_state.audio_cache:
-            audio_bytes = st.session_state.audio_cache[index]
-            base_duration = st.session_state.audio_durations[index]
-            duration = base_duration / speed
-        else:
-            audio_bytes, duration = generate_audio(text, speed)
+        # 공유 저장소에서 오디오를 가져오거나 생성 (세션에는 캐시 키만 보관)
+        key, audio_bytes, meta = _get_audio_entry(text)
+        st.session_state.audio_cache[text_hash(text)] = key
+        st.session_state.audio_durations[text_hash(text)] = meta['duration']
+        if pattern != 'en':
+            key, audio_bytes, meta = _get_bilingual_entry(text, korean, pattern)
 
         # HTML5 오디오 플레이어 (자동 재생)
-        import base64
         import time as time_module
-        audio_base64 = base64.b64encode(audio_bytes).decode()
+        audio_sources, playback_rate, duration = get_playback_source(key, audio_bytes, meta, speed)
         unique_id = f"audio_{int(time_module.time() * 1000000)}"
 
         audio_html = f"""
         <audio id="{unique_id}" controls autoplay style="width: 100%; margin: 10px 0;">
-            <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
+            {_source_tags(audio_sources)}
         </audio>
         <script>
             (function() {{
                 var audio = document.getElementById('{unique_id}');
                 if (audio) {{
-                    audio.playbackRate = {speed};
+                    audio.playbackRate = {playback_rate};
                     audio.volume = 0.8;
 
                     // 자동 재생 시도
@@ -439,12 +1570,34 @@ def play_audio_with_stats_v2(text: str, index: int, speed: float = 1.0, audio_pl
         return 0.0
 
 
-def play_audio_with_mediaelement(df, current_index: int, speed: float = 1.0) -> str:
+def render_waveform(peaks, duration: float = None) -> str:
+    """
+    파형 요약으로 비주얼라이저 HTML을 만듭니다.
+    duration을 주면 재생 위치만큼 밝은 파형이 CSS 애니메이션으로 채워집니다 (서버 왕복 없음).
+
+    Args:
+        peaks: get_row_peaks()의 구간별 최대 진폭
+        duration: 실제 재생 시간(초), 재생 중이 아니면 None
+
+    Returns:
+        str: 비주얼라이저 HTML
+    """
+    loudest = max(max(peaks), 1)
+    bars = ''.join(f'<span style="height: {max(2, round(peak * 100 / loudest))}%"></span>' for peak in peaks)
+
+    played = ''
+    if duration:
+        played = f'<div class="waveform-bars waveform-played" style="animation-duration: {duration:.3f}s">{bars}</div>'
+
+    return f'<div class="waveform"><div class="waveform-bars">{bars}</div>{played}</div>'
+
+
+def play_audio_with_mediaelement(deck: Deck, current_index: int, speed: float = 1.0) -> str:
     """
     Generate HTML playlist with MediaElement.js styling.
 
     Args:
-        df: DataFrame with all sentences
+        deck: Deck with all sentences
         current_index: Current sentence index
         speed: Playback speed (0.5-2.0)
 
@@ -454,27 +1607,20 @@ def play_audio_with_mediaelement(df, current_index: int, speed: float = 1.0) ->
     try:
         # Build playlist HTML
         playlist_html = '<div class="mejs__playlist" style="margin-top: 10px;">'
-        playlist_html += f'<div style="background: linear-gradient(180deg, #4a6a8a 0%, #2a4a6a 100%); padding: 8px 12px; border-bottom: 1px solid #00ff00; color: #00ff00; font-weight: bold; font-family: \'Courier New\', monospace;">PLAYLIST - {len(df)} SENTENCES</div>'
+        playlist_html += f'<div style="background: linear-gradient(180deg, #4a6a8a 0%, #2a4a6a 100%); padding: 8px 12px; border-bottom: 1px solid #00ff00; color: #00ff00; font-weight: bold; font-family: \'Courier New\', monospace;">PLAYLIST - {len(deck)} SENTENCES</div>'
 
-        for idx, row in df.iterrows():
+        for idx in range(len(deck)):
             # Determine if this is the current item
             item_class = 'mejs__playlist-item'
             if idx == current_index:
                 item_class += ' mejs__playlist-current'
 
-            # Get duration
-            if idx in st.session_state.audio_durations:
-                duration_sec = int(st.session_state.audio_durations[idx])
-                timestamp = f"{duration_sec // 60:02d}:{duration_sec % 60:02d}"
-            else:
-                timestamp = "00:00"
-
             # Create playlist item
             playlist_html += f'''
             <div class="{item_class}" style="position: relative;">
-                <div class="mejs__playlist-title">{idx + 1}. {row["English"]}</div>
-                <div class="mejs__playlist-description">{row.get("Korean", "")}</div>
-                <div style="position: absolute; right: 12px; top: 10px; color: #00ff00; font-size: 11px; font-family: \'Courier New\', monospace;">{timestamp}</div>
+                <div class="mejs__playlist-title">{idx + 1}. {deck.english[idx]}</div>
+                <div class="mejs__playlist-description">{deck.korean[idx]}</div>
+                <div style="position: absolute; right: 12px; top: 10px; color: #00ff00; font-size: 11px; font-family: \'Courier New\', monospace;">{deck.durations[idx]}</div>
             </div>
             '''
 